@@ -3,17 +3,29 @@ API service for the AI model deployment platform.
 This module provides a RESTful API for interacting with the platform.
 """
 
+import asyncio
 import datetime
+import functools
 import json
 import logging
 import os
+import shutil
+import threading
+import time
 import uuid
-from typing import Dict, List, Optional, Union
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple, Union
 
+import aiofiles
+import orjson
 from fastapi import FastAPI, File, Form, HTTPException, Query, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
-from pydantic import BaseModel, Field
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse, ORJSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
 
 from core.deployment import DeploymentService
 from core.models import (
@@ -44,21 +56,136 @@ logging.basicConfig(
 
 logger = logging.getLogger(__name__)
 
+# Background work (simulated optimizations and deployments) runs on a bounded
+# pool so request spikes queue jobs instead of spawning unbounded threads
+BACKGROUND_WORKERS = int(os.environ.get("AIDEPLOY_BACKGROUND_WORKERS", os.cpu_count() or 4))
+background_executor = ThreadPoolExecutor(
+    max_workers=BACKGROUND_WORKERS,
+    thread_name_prefix="aideploy-background",
+)
+
+# Uploaded and optimized model files live in one directory per model under
+# these roots, which are created once at startup
+STORAGE_ROOT = Path(os.environ.get("AIDEPLOY_STORAGE_ROOT", "/tmp/ai-deploy-platform"))
+MODELS_ROOT = STORAGE_ROOT / "models"
+OPTIMIZED_MODELS_ROOT = STORAGE_ROOT / "optimized_models"
+
+# In-process cache for the read-heavy model and deployment GET endpoints.
+# Entries hold the encoded JSON body and expire after RESPONSE_CACHE_TTL
+# seconds, and every write clears its namespace so clients never see stale
+# status. Writes made through the model repository and deployment service
+# outside the handlers (cost optimization, storage tiering) clear it too.
+RESPONSE_CACHE_TTL = 30.0
+_response_cache: Dict[str, Dict[str, Tuple[float, bytes]]] = {"models": {}, "deployments": {}}
+_response_cache_generation: Dict[str, int] = {"models": 0, "deployments": 0}
+_response_cache_lock = threading.Lock()
+
+
+def cached_response(namespace: str):
+    """Cache an endpoint's result until it expires or its namespace is invalidated.
+    
+    The result is encoded with orjson once and returned as a plain Response,
+    so FastAPI doesn't re-validate it against the route's response_model on
+    every request. Endpoints using this must return payloads already shaped
+    like their response model.
+    
+    Args:
+        namespace: Cache namespace cleared by writes to the underlying data
+        
+    Returns:
+        Decorator for async endpoint functions
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(**kwargs):
+            key = f"{func.__name__}:{sorted(kwargs.items())}"
+            with _response_cache_lock:
+                entry = _response_cache[namespace].get(key)
+                generation = _response_cache_generation[namespace]
+            if entry and entry[0] > time.monotonic():
+                return Response(content=entry[1], media_type="application/json")
+            
+            body = orjson.dumps(
+                await func(**kwargs), option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+            )
+            
+            with _response_cache_lock:
+                # Skip storing if a write landed while the result was being built
+                if _response_cache_generation[namespace] == generation:
+                    _response_cache[namespace][key] = (time.monotonic() + RESPONSE_CACHE_TTL, body)
+            return Response(content=body, media_type="application/json")
+        
+        return wrapper
+    
+    return decorator
+
+
+def invalidate_response_cache(namespace: str) -> None:
+    """Drop all cached responses in a namespace.
+    
+    Args:
+        namespace: Cache namespace to clear
+    """
+    with _response_cache_lock:
+        _response_cache[namespace].clear()
+        _response_cache_generation[namespace] += 1
+
+
+# Chunk and write-buffer sizes for streaming model uploads to disk
+UPLOAD_CHUNK_SIZE = 1 << 20  # 1 MiB
+UPLOAD_BUFFER_SIZE = 2 << 20  # 2 MiB
+
+# Lookup tables for validating enum values in request payloads
+OPTIMIZATION_METHODS = {method.value: method for method in OptimizationMethod}
+DEPLOYMENT_TYPES = {deployment_type.value: deployment_type for deployment_type in DeploymentType}
+
+# Optimizations that are still running, keyed by (model ID, method, target
+# size, target latency). Identical requests made while one is in flight get
+# its optimized model back instead of starting a second copy
+_inflight_optimizations: Dict[Tuple, OptimizedModel] = {}
+_inflight_optimizations_lock = threading.Lock()
+
 # Create FastAPI app
 app = FastAPI(
     title="AI Deploy Platform API",
     description="API for the AI model deployment platform",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
 )
 
-# Add CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+class EventStreamAwareGZipMiddleware(GZipMiddleware):
+    """GZip middleware that leaves server-sent event streams uncompressed.
+    
+    The gzip stream only emits bytes once enough data has been buffered, which
+    would hold back individual status events.
+    """
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].endswith("/events"):
+            await self.app(scope, receive, send)
+            return
+        await super().__call__(scope, receive, send)
+
+
+# Compress large JSON payloads (deployment lists, metrics series)
+app.add_middleware(EventStreamAwareGZipMiddleware, minimum_size=1024, compresslevel=5)
+
+# Add CORS middleware for the browser origins listed in AIDEPLOY_CORS_ORIGINS
+# (comma-separated). With none configured the middleware is skipped: the CLI
+# and server-side clients don't need CORS, and a reverse proxy in front of
+# the API can add the headers without a Python hop per request
+CORS_ORIGINS = [
+    origin.strip() for origin in os.environ.get("AIDEPLOY_CORS_ORIGINS", "").split(",")
+    if origin.strip()
+]
+if CORS_ORIGINS:
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=CORS_ORIGINS,
+        allow_credentials=True,
+        allow_methods=["GET", "POST", "PUT", "DELETE"],
+        allow_headers=["Authorization", "Content-Type"],
+    )
 
 # Initialize services
 model_repository = ModelRepository()
@@ -69,6 +196,33 @@ multi_cloud_arbitrage = MultiCloudArbitrage(deployment_service)
 storage_tiering = StorageTiering(model_repository)
 monitoring_service = MonitoringService(deployment_service, model_repository)
 analytics_service = AnalyticsService(deployment_service, monitoring_service)
+model_repository.subscribe_writes(lambda: invalidate_response_cache("models"))
+deployment_service.subscribe_writes(lambda: invalidate_response_cache("deployments"))
+
+
+@app.on_event("startup")
+def create_storage_roots():
+    """Create the model storage roots so handlers only create per-model directories."""
+    MODELS_ROOT.mkdir(parents=True, exist_ok=True)
+    OPTIMIZED_MODELS_ROOT.mkdir(parents=True, exist_ok=True)
+
+
+@app.on_event("startup")
+def start_price_refresh():
+    """Keep multi-cloud prices fresh in the background instead of on each check."""
+    multi_cloud_arbitrage.start_price_refresh()
+
+
+@app.on_event("shutdown")
+def shutdown_background_executor():
+    """Let queued background jobs finish before the process exits."""
+    background_executor.shutdown(wait=True)
+
+
+@app.on_event("shutdown")
+def stop_price_refresh():
+    """Stop the background multi-cloud price refresh."""
+    multi_cloud_arbitrage.stop_price_refresh()
 
 
 # Define API models
@@ -139,6 +293,7 @@ class CostOptimizationPolicyModel(BaseModel):
     hibernation_enabled: bool = False
     hibernation_idle_timeout: int = 1800
     multi_cloud_enabled: bool = False
+    spot_allocation_strategy: str = "lowest-price"
 
 
 class CreateDeploymentRequest(BaseModel):
@@ -175,6 +330,255 @@ class DeploymentResponse(BaseModel):
     metadata: Dict = Field(default_factory=dict)
 
 
+class ModelWithDeploymentResponse(BaseModel):
+    model: ModelUploadResponse
+    deployment: DeploymentResponse
+
+
+# Serialized payloads keyed by object ID and last modification, so list
+# endpoints only rebuild the rows that changed since the previous request
+PAYLOAD_CACHE_SIZE = 4096
+_payload_cache: "OrderedDict[Tuple, Dict]" = OrderedDict()
+_payload_cache_lock = threading.Lock()
+
+
+def _cached_payload(key: Tuple, build: Callable[[], Dict]) -> Dict:
+    """Return a cached response payload, building and storing it on a miss.
+    
+    Args:
+        key: Cache key identifying the object version
+        build: Function that serializes the object
+        
+    Returns:
+        Response payload
+    """
+    with _payload_cache_lock:
+        payload = _payload_cache.get(key)
+        if payload is not None:
+            _payload_cache.move_to_end(key)
+            return payload
+    
+    payload = build()
+    
+    with _payload_cache_lock:
+        _payload_cache[key] = payload
+        if len(_payload_cache) > PAYLOAD_CACHE_SIZE:
+            _payload_cache.popitem(last=False)
+    return payload
+
+
+def _model_payload(model: Model) -> Dict:
+    """Serialize a model for API responses."""
+    def build():
+        return {
+            "id": model.id,
+            "name": model.name,
+            "framework": model.framework,
+            "version": model.version,
+            "storage_path": model.storage_path,
+            "created_at": model.created_at.isoformat(),
+            "updated_at": model.updated_at.isoformat(),
+            "metadata": model.metadata,
+        }
+    
+    return _cached_payload(("model", model.id, model.updated_at), build)
+
+
+def _optimized_model_payload(optimized_model: OptimizedModel) -> Dict:
+    """Serialize an optimized model for API responses."""
+    def build():
+        return {
+            "id": optimized_model.id,
+            "original_model_id": optimized_model.original_model_id,
+            "optimization_method": optimized_model.optimization_method.value,
+            "status": optimized_model.status.value,
+            "storage_path": optimized_model.storage_path,
+            "size_reduction_percentage": optimized_model.size_reduction_percentage,
+            "latency_reduction_percentage": optimized_model.latency_reduction_percentage,
+            "accuracy_change_percentage": optimized_model.accuracy_change_percentage,
+            "created_at": optimized_model.created_at.isoformat(),
+            "updated_at": optimized_model.updated_at.isoformat(),
+            "metadata": optimized_model.metadata,
+        }
+    
+    key = ("optimized_model", optimized_model.id, optimized_model.updated_at, optimized_model.status)
+    return _cached_payload(key, build)
+
+
+def _deployment_payload(deployment: Deployment) -> Dict:
+    """Serialize a deployment for API responses."""
+    def build():
+        return {
+            "id": deployment.id,
+            "name": deployment.name,
+            "model_id": deployment.model_id,
+            "model_type": deployment.model_type,
+            "deployment_type": deployment.deployment_type.value,
+            "status": deployment.status.value,
+            "endpoint": deployment.endpoint,
+            "resource_requirements": deployment.resource_requirements.dict(),
+            "scaling_policy": deployment.scaling_policy.dict(),
+            "cost_optimization_policy": deployment.cost_optimization_policy.dict(),
+            "created_at": deployment.created_at.isoformat(),
+            "updated_at": deployment.updated_at.isoformat(),
+            "metadata": deployment.metadata,
+        }
+    
+    key = ("deployment", deployment.id, deployment.updated_at, deployment.status)
+    return _cached_payload(key, build)
+
+
+# Metrics and analytics results keyed by query, with the time range rounded
+# down to TIMESERIES_BUCKET_SECONDS so successive dashboard polls share
+# entries. Entries are fresh for a TTL scaled to the queried span, served
+# while being refreshed in the background for one more TTL, and kept as a
+# fallback for TIMESERIES_STALE_GRACE seconds in case the backend fails
+TIMESERIES_BUCKET_SECONDS = 30
+TIMESERIES_MIN_TTL = 10.0
+TIMESERIES_MAX_TTL = 300.0
+TIMESERIES_STALE_GRACE = 3600.0
+TIMESERIES_CACHE_SIZE = 1024
+_timeseries_cache: "OrderedDict[Tuple, Tuple[float, float, object]]" = OrderedDict()
+_timeseries_refreshing: set = set()
+_timeseries_lock = threading.Lock()
+
+
+def _floor_time(value: datetime.datetime) -> datetime.datetime:
+    """Round a timestamp down to the start of its cache bucket."""
+    seconds = (value.minute * 60 + value.second) % TIMESERIES_BUCKET_SECONDS
+    return value.replace(microsecond=0) - datetime.timedelta(seconds=seconds)
+
+
+def _timeseries_ttl(start: datetime.datetime, end: datetime.datetime) -> float:
+    """Get the cache lifetime for a time range: 10s for minutes, 5 min for a week."""
+    span = (end - start).total_seconds()
+    return min(TIMESERIES_MAX_TTL, max(TIMESERIES_MIN_TTL, span / 2016))
+
+
+def _store_timeseries(key: Tuple, ttl: float, data: object) -> None:
+    """Store a time-series result, evicting the least recently stored entries."""
+    with _timeseries_lock:
+        _timeseries_cache[key] = (time.monotonic(), ttl, data)
+        _timeseries_cache.move_to_end(key)
+        while len(_timeseries_cache) > TIMESERIES_CACHE_SIZE:
+            _timeseries_cache.popitem(last=False)
+
+
+def _cached_timeseries(
+    kind: str,
+    query: Callable,
+    deployment: Deployment,
+    metrics: List[str],
+    start: datetime.datetime,
+    end: datetime.datetime,
+):
+    """Run a metrics or analytics query through the time-series cache.
+    
+    Args:
+        kind: Query kind, used to keep metrics and analytics entries apart
+        query: Service method taking (deployment, metrics, start, end)
+        deployment: Deployment to query
+        metrics: Metrics to include
+        start: Start of the time range
+        end: End of the time range
+        
+    Returns:
+        Query result, possibly served from cache
+    """
+    start, end = _floor_time(start), _floor_time(end)
+    key = (kind, deployment.id, start, end, tuple(sorted(metrics)))
+    ttl = _timeseries_ttl(start, end)
+    
+    with _timeseries_lock:
+        entry = _timeseries_cache.get(key)
+    age = time.monotonic() - entry[0] if entry else None
+    
+    if entry and age < entry[1]:
+        return entry[2]
+    
+    if entry and age < 2 * entry[1]:
+        # Serve the stale result now and refresh it off the request path
+        with _timeseries_lock:
+            refresh = key not in _timeseries_refreshing
+            _timeseries_refreshing.add(key)
+        
+        if refresh:
+            def revalidate():
+                try:
+                    _store_timeseries(key, ttl, query(deployment, metrics, start, end))
+                except Exception as e:
+                    logger.warning(f"Background refresh of {kind} for deployment {deployment.id} failed: {e}")
+                finally:
+                    with _timeseries_lock:
+                        _timeseries_refreshing.discard(key)
+            
+            background_executor.submit(revalidate)
+        return entry[2]
+    
+    try:
+        data = query(deployment, metrics, start, end)
+    except Exception as e:
+        if entry and age < TIMESERIES_STALE_GRACE:
+            logger.warning(f"Serving cached {kind} for deployment {deployment.id} after query failure: {e}")
+            return entry[2]
+        raise
+    
+    _store_timeseries(key, ttl, data)
+    return data
+
+
+# Target size of the chunks written by _stream_json
+STREAM_CHUNK_SIZE = 64 * 1024
+_STREAM_JSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def _stream_json(data: object) -> Iterator[bytes]:
+    """Serialize a metrics or analytics result as a stream of JSON chunks.
+    
+    Lists, and lists nested one level inside a dict, are encoded one point
+    at a time, so the body is never held as one serialized buffer and the
+    first bytes go out as soon as the first points are encoded. The output
+    is the same JSON document a plain response would produce.
+    
+    Args:
+        data: Query result to serialize
+        
+    Returns:
+        Iterator over chunks of the encoded document
+    """
+    buffer = bytearray()
+    
+    def emit_list(items: list) -> Iterator[bytes]:
+        buffer.extend(b"[")
+        for index, item in enumerate(items):
+            if index:
+                buffer.extend(b",")
+            buffer.extend(orjson.dumps(item, option=_STREAM_JSON_OPTIONS))
+            if len(buffer) >= STREAM_CHUNK_SIZE:
+                yield bytes(buffer)
+                buffer.clear()
+        buffer.extend(b"]")
+    
+    if isinstance(data, list):
+        yield from emit_list(data)
+    elif isinstance(data, dict):
+        buffer.extend(b"{")
+        for index, (key, value) in enumerate(data.items()):
+            if index:
+                buffer.extend(b",")
+            buffer.extend(orjson.dumps(str(key)))
+            buffer.extend(b":")
+            if isinstance(value, list):
+                yield from emit_list(value)
+            else:
+                buffer.extend(orjson.dumps(value, option=_STREAM_JSON_OPTIONS))
+        buffer.extend(b"}")
+    else:
+        buffer.extend(orjson.dumps(data, option=_STREAM_JSON_OPTIONS))
+    
+    yield bytes(buffer)
+
+
 # API routes
 @app.get("/")
 async def root():
@@ -182,21 +586,47 @@ async def root():
     return {"message": "Welcome to the AI Deploy Platform API"}
 
 
+@app.get("/ready")
+async def ready():
+    """Readiness probe.
+    
+    Reports ready once the shared services are built and the model storage
+    roots are writable, so load balancers only route traffic to instances
+    that can accept uploads.
+    """
+    def check_storage() -> List[str]:
+        return [
+            str(root) for root in (MODELS_ROOT, OPTIMIZED_MODELS_ROOT)
+            if not os.access(root, os.W_OK)
+        ]
+    
+    unavailable = await run_in_threadpool(check_storage)
+    if unavailable:
+        return JSONResponse(
+            status_code=503,
+            content={"status": "unavailable", "unwritable_paths": unavailable},
+        )
+    
+    return {"status": "ready"}
+
+
 # Model routes
 @app.get("/models", response_model=List[ModelResponse])
+@cached_response("models")
 async def list_models():
     """List all models."""
     models = model_repository.list_models()
-    return [model.dict() for model in models]
+    return [_model_payload(model) for model in models]
 
 
 @app.get("/models/{model_id}", response_model=ModelResponse)
+@cached_response("models")
 async def get_model(model_id: str):
     """Get a model."""
     model = model_repository.get_model(model_id)
     if not model:
         raise HTTPException(status_code=404, detail="Model not found")
-    return model.dict()
+    return _model_payload(model)
 
 
 @app.post("/models", response_model=ModelUploadResponse)
@@ -214,28 +644,33 @@ async def upload_model(
         
         # Save model file
         model_id = str(uuid.uuid4())
-        storage_dir = os.path.join("/tmp/ai-deploy-platform/models", model_id)
-        os.makedirs(storage_dir, exist_ok=True)
+        storage_dir = MODELS_ROOT / model_id
+        await run_in_threadpool(storage_dir.mkdir)
         
-        storage_path = os.path.join(storage_dir, file.filename)
+        storage_path = storage_dir / file.filename
         
-        with open(storage_path, "wb") as f:
-            f.write(await file.read())
+        # Copy the upload in chunks so large models never sit in memory whole
+        # and the event loop isn't blocked on disk writes
+        async with aiofiles.open(storage_path, "wb", buffering=UPLOAD_BUFFER_SIZE) as f:
+            while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+                await f.write(chunk)
         
         # Create model
+        now = datetime.datetime.utcnow()
         model = Model(
             id=model_id,
             name=name,
             framework=framework,
             version=version,
-            storage_path=storage_path,
-            created_at=datetime.datetime.utcnow(),
-            updated_at=datetime.datetime.utcnow(),
+            storage_path=str(storage_path),
+            created_at=now,
+            updated_at=now,
             metadata=metadata_dict,
         )
         
         # Save model
-        model_repository._save_model_metadata(model)
+        await run_in_threadpool(model_repository._save_model_metadata, model)
+        invalidate_response_cache("models")
         
         return {
             "model_id": model.id,
@@ -260,27 +695,42 @@ async def delete_model(model_id: str):
         raise HTTPException(status_code=404, detail="Model not found")
     
     # Check if model is used by any deployments
-    deployments = deployment_service.list_deployments()
-    for deployment in deployments:
-        if deployment.model_id == model_id:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Model is used by deployment {deployment.id}",
-            )
+    deployment_ids = await run_in_threadpool(deployment_service.get_deployment_ids_for_model, model_id)
+    if deployment_ids:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Model is used by deployment {next(iter(deployment_ids))}",
+        )
     
-    # Delete model
-    try:
-        # Delete model file
-        if os.path.exists(model.storage_path):
-            os.remove(model.storage_path)
-        
-        # Delete model directory
-        storage_dir = os.path.dirname(model.storage_path)
-        if os.path.exists(storage_dir):
-            os.rmdir(storage_dir)
+    # Delete model files and metadata off the event loop, since these are
+    # blocking filesystem calls that can be slow on network storage
+    def delete_files():
+        storage_dir = Path(model.storage_path).parent
+        if storage_dir.parent == MODELS_ROOT:
+            # Rename the model directory out of the way first so readers see
+            # either the whole model or nothing, then remove it with anything
+            # else stored alongside the model file
+            deleting_dir = storage_dir.with_name(f"{storage_dir.name}.deleting")
+            try:
+                os.rename(storage_dir, deleting_dir)
+            except FileNotFoundError:
+                pass
+            else:
+                shutil.rmtree(deleting_dir, ignore_errors=True)
+        else:
+            # Never remove a directory this API didn't create
+            try:
+                os.remove(model.storage_path)
+            except FileNotFoundError:
+                pass
         
         # Delete model metadata
         model_repository._delete_model_metadata(model)
+    
+    # Delete model
+    try:
+        await run_in_threadpool(delete_files)
+        invalidate_response_cache("models")
         
         return {"message": f"Model {model_id} deleted successfully"}
     
@@ -297,40 +747,53 @@ async def optimize_model(model_id: str, request: OptimizeModelRequest):
     
     try:
         # Validate optimization method
-        try:
-            method = OptimizationMethod(request.method)
-        except ValueError:
+        method = OPTIMIZATION_METHODS.get(request.method)
+        if method is None:
             raise HTTPException(
                 status_code=400,
                 detail=f"Invalid optimization method: {request.method}",
             )
         
-        # Create optimized model
-        optimized_model_id = str(uuid.uuid4())
-        optimized_model = OptimizedModel(
-            id=optimized_model_id,
-            original_model_id=model_id,
-            optimization_method=method,
-            status=OptimizationStatus.OPTIMIZING,
-            created_at=datetime.datetime.utcnow(),
-            updated_at=datetime.datetime.utcnow(),
-            metadata={
-                "target_size": request.target_size,
-                "target_latency": request.target_latency,
-                **request.metadata,
-            },
-        )
+        # Return the running optimization if an identical one is in flight,
+        # otherwise create an optimized model and register it
+        inflight_key = (model_id, method.value, request.target_size, request.target_latency)
+        with _inflight_optimizations_lock:
+            existing = _inflight_optimizations.get(inflight_key)
+            if existing is None:
+                optimized_model_id = str(uuid.uuid4())
+                now = datetime.datetime.utcnow()
+                optimized_model = OptimizedModel(
+                    id=optimized_model_id,
+                    original_model_id=model_id,
+                    optimization_method=method,
+                    status=OptimizationStatus.OPTIMIZING,
+                    created_at=now,
+                    updated_at=now,
+                    metadata={
+                        "target_size": request.target_size,
+                        "target_latency": request.target_latency,
+                        **request.metadata,
+                    },
+                )
+                _inflight_optimizations[inflight_key] = optimized_model
+        
+        if existing is not None:
+            return _optimized_model_payload(existing)
         
         # Save optimized model metadata
-        model_repository._save_optimized_model_metadata(optimized_model)
+        try:
+            await run_in_threadpool(model_repository._save_optimized_model_metadata, optimized_model)
+        except Exception:
+            with _inflight_optimizations_lock:
+                _inflight_optimizations.pop(inflight_key, None)
+            raise
+        invalidate_response_cache("models")
         
         # Start optimization in background
         # In a real implementation, this would be done asynchronously
         # For this implementation, we'll simulate optimization
         
         # Simulate optimization
-        import threading
-        
         def optimize():
             try:
                 # Simulate optimization delay
@@ -340,38 +803,52 @@ async def optimize_model(model_id: str, request: OptimizeModelRequest):
                 time.sleep(5)
                 
                 # Create optimized model file
-                storage_dir = os.path.join("/tmp/ai-deploy-platform/optimized_models", optimized_model_id)
-                os.makedirs(storage_dir, exist_ok=True)
+                storage_dir = OPTIMIZED_MODELS_ROOT / optimized_model_id
+                storage_dir.mkdir()
                 
-                storage_path = os.path.join(storage_dir, f"optimized_{os.path.basename(model.storage_path)}")
+                storage_path = storage_dir / f"optimized_{Path(model.storage_path).name}"
                 
                 # Copy original model file
-                import shutil
+                model_repository._fastcopy(model.storage_path, storage_path)
                 
-                shutil.copy2(model.storage_path, storage_path)
+                # Reload by ID so changes made while this job ran aren't
+                # overwritten, and skip it if it is no longer optimizing
+                current = model_repository.get_optimized_model(optimized_model_id, model)
+                if not current or current.status != OptimizationStatus.OPTIMIZING:
+                    return
                 
                 # Update optimized model
-                optimized_model.status = OptimizationStatus.COMPLETED
-                optimized_model.storage_path = storage_path
-                optimized_model.size_reduction_percentage = random.uniform(20, 80)
-                optimized_model.latency_reduction_percentage = random.uniform(10, 50)
-                optimized_model.accuracy_change_percentage = random.uniform(-5, 0)
-                optimized_model.updated_at = datetime.datetime.utcnow()
+                current.status = OptimizationStatus.COMPLETED
+                current.storage_path = str(storage_path)
+                current.size_reduction_percentage = random.uniform(20, 80)
+                current.latency_reduction_percentage = random.uniform(10, 50)
+                current.accuracy_change_percentage = random.uniform(-5, 0)
+                current.updated_at = datetime.datetime.utcnow()
                 
                 # Save optimized model metadata
-                model_repository._save_optimized_model_metadata(optimized_model)
+                model_repository._save_optimized_model_metadata(current)
+                invalidate_response_cache("models")
             
             except Exception as e:
+                current = model_repository.get_optimized_model(optimized_model_id, model)
+                if not current:
+                    return
+                
                 # Update optimized model with error
-                optimized_model.status = OptimizationStatus.FAILED
-                optimized_model.updated_at = datetime.datetime.utcnow()
-                optimized_model.metadata["error"] = str(e)
+                current.status = OptimizationStatus.FAILED
+                current.updated_at = datetime.datetime.utcnow()
+                current.metadata["error"] = str(e)
                 
                 # Save optimized model metadata
-                model_repository._save_optimized_model_metadata(optimized_model)
+                model_repository._save_optimized_model_metadata(current)
+                invalidate_response_cache("models")
+            
+            finally:
+                with _inflight_optimizations_lock:
+                    _inflight_optimizations.pop(inflight_key, None)
         
-        # Start optimization thread
-        threading.Thread(target=optimize).start()
+        # Queue optimization on the bounded background pool
+        background_executor.submit(optimize)
         
         return {
             "id": optimized_model.id,
@@ -386,6 +863,7 @@ async def optimize_model(model_id: str, request: OptimizeModelRequest):
 
 
 @app.get("/models/{model_id}/optimized", response_model=List[OptimizedModelResponse])
+@cached_response("models")
 async def list_optimized_models(model_id: str):
     """List optimized versions of a model."""
     model = model_repository.get_model(model_id)
@@ -394,72 +872,71 @@ async def list_optimized_models(model_id: str):
     
     optimized_models = model_repository.list_optimized_models(model)
     
-    return [
-        {
-            "id": model.id,
-            "original_model_id": model.original_model_id,
-            "optimization_method": model.optimization_method.value,
-            "status": model.status.value,
-            "storage_path": model.storage_path,
-            "size_reduction_percentage": model.size_reduction_percentage,
-            "latency_reduction_percentage": model.latency_reduction_percentage,
-            "accuracy_change_percentage": model.accuracy_change_percentage,
-            "created_at": model.created_at.isoformat(),
-            "updated_at": model.updated_at.isoformat(),
-            "metadata": model.metadata,
-        }
-        for model in optimized_models
-    ]
+    return [_optimized_model_payload(optimized_model) for optimized_model in optimized_models]
 
 
 # Deployment routes
 @app.get("/deployments", response_model=List[DeploymentResponse])
+@cached_response("deployments")
 async def list_deployments():
     """List all deployments."""
     deployments = deployment_service.list_deployments()
     
-    return [
-        {
-            "id": deployment.id,
-            "name": deployment.name,
-            "model_id": deployment.model_id,
-            "model_type": deployment.model_type,
-            "deployment_type": deployment.deployment_type.value,
-            "status": deployment.status.value,
-            "endpoint": deployment.endpoint,
-            "resource_requirements": deployment.resource_requirements.dict(),
-            "scaling_policy": deployment.scaling_policy.dict(),
-            "cost_optimization_policy": deployment.cost_optimization_policy.dict(),
-            "created_at": deployment.created_at.isoformat(),
-            "updated_at": deployment.updated_at.isoformat(),
-            "metadata": deployment.metadata,
-        }
-        for deployment in deployments
-    ]
+    return [_deployment_payload(deployment) for deployment in deployments]
 
 
 @app.get("/deployments/{deployment_id}", response_model=DeploymentResponse)
+@cached_response("deployments")
 async def get_deployment(deployment_id: str):
     """Get a deployment."""
     deployment = deployment_service.get_deployment(deployment_id)
     if not deployment:
         raise HTTPException(status_code=404, detail="Deployment not found")
     
-    return {
-        "id": deployment.id,
-        "name": deployment.name,
-        "model_id": deployment.model_id,
-        "model_type": deployment.model_type,
-        "deployment_type": deployment.deployment_type.value,
-        "status": deployment.status.value,
-        "endpoint": deployment.endpoint,
-        "resource_requirements": deployment.resource_requirements.dict(),
-        "scaling_policy": deployment.scaling_policy.dict(),
-        "cost_optimization_policy": deployment.cost_optimization_policy.dict(),
-        "created_at": deployment.created_at.isoformat(),
-        "updated_at": deployment.updated_at.isoformat(),
-        "metadata": deployment.metadata,
-    }
+    return _deployment_payload(deployment)
+
+
+# Seconds between deployment status checks for each open event stream
+DEPLOYMENT_EVENTS_POLL_INTERVAL = 0.5
+
+
+@app.get("/deployments/{deployment_id}/events")
+async def stream_deployment_events(
+    deployment_id: str,
+    timeout: float = Query(60.0, gt=0, le=600),
+):
+    """Stream deployment status changes as server-sent events."""
+    if not await run_in_threadpool(deployment_service.get_deployment, deployment_id):
+        raise HTTPException(status_code=404, detail="Deployment not found")
+    
+    async def events():
+        last_status = None
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            # Reading the deployment is file I/O, so keep it off the event loop
+            deployment = await run_in_threadpool(deployment_service.get_deployment, deployment_id)
+            if not deployment:
+                yield "event: deleted\ndata: deleted\n\n"
+                return
+            
+            status = deployment.status.value
+            if status != last_status:
+                yield f"event: status\ndata: {status}\n\n"
+                last_status = status
+            
+            if deployment.status in (DeploymentStatus.FAILED, DeploymentStatus.TERMINATED):
+                return
+            
+            # Status is only persisted to disk, so check it more often than a
+            # remote client could poll without adding round trips, but not so
+            # often that many watchers crowd out other requests
+            await asyncio.sleep(DEPLOYMENT_EVENTS_POLL_INTERVAL)
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
 
 
 @app.post("/deployments", response_model=DeploymentResponse)
@@ -482,9 +959,8 @@ async def create_deployment(request: CreateDeploymentRequest):
                 )
         
         # Validate deployment type
-        try:
-            deployment_type = DeploymentType(request.deployment_type)
-        except ValueError:
+        deployment_type = DEPLOYMENT_TYPES.get(request.deployment_type)
+        if deployment_type is None:
             raise HTTPException(
                 status_code=400,
                 detail=f"Invalid deployment type: {request.deployment_type}",
@@ -511,10 +987,12 @@ async def create_deployment(request: CreateDeploymentRequest):
             hibernation_enabled=request.cost_optimization_policy.hibernation_enabled,
             hibernation_idle_timeout=request.cost_optimization_policy.hibernation_idle_timeout,
             multi_cloud_enabled=request.cost_optimization_policy.multi_cloud_enabled,
+            spot_allocation_strategy=request.cost_optimization_policy.spot_allocation_strategy,
         )
         
         # Create deployment
         deployment_id = str(uuid.uuid4())
+        now = datetime.datetime.utcnow()
         deployment = Deployment(
             id=deployment_id,
             name=request.name,
@@ -525,21 +1003,20 @@ async def create_deployment(request: CreateDeploymentRequest):
             resource_requirements=resource_requirements,
             scaling_policy=scaling_policy,
             cost_optimization_policy=cost_optimization_policy,
-            created_at=datetime.datetime.utcnow(),
-            updated_at=datetime.datetime.utcnow(),
+            created_at=now,
+            updated_at=now,
             metadata=request.metadata,
         )
         
         # Save deployment
         deployment_service.create_deployment(deployment)
+        invalidate_response_cache("deployments")
         
         # Start deployment in background
         # In a real implementation, this would be done asynchronously
         # For this implementation, we'll simulate deployment
         
         # Simulate deployment
-        import threading
-        
         def deploy():
             try:
                 # Simulate deployment delay
@@ -547,46 +1024,82 @@ async def create_deployment(request: CreateDeploymentRequest):
                 
                 time.sleep(5)
                 
+                # Reload by ID so changes made while this job was queued aren't
+                # overwritten, and skip it if the deployment has moved on
+                current = deployment_service.get_deployment(deployment_id)
+                if not current or current.status != DeploymentStatus.CREATING:
+                    return
+                
                 # Update deployment
-                deployment.status = DeploymentStatus.RUNNING
-                deployment.endpoint = f"https://api.ai-deploy-platform.example.com/deployments/{deployment_id}/predict"
-                deployment.updated_at = datetime.datetime.utcnow()
+                current.status = DeploymentStatus.RUNNING
+                current.endpoint = f"https://api.ai-deploy-platform.example.com/deployments/{deployment_id}/predict"
+                current.updated_at = datetime.datetime.utcnow()
                 
                 # Save deployment
-                deployment_service.update_deployment(deployment)
+                deployment_service.update_deployment(current)
+                invalidate_response_cache("deployments")
             
             except Exception as e:
+                current = deployment_service.get_deployment(deployment_id)
+                if not current:
+                    return
+                
                 # Update deployment with error
-                deployment.status = DeploymentStatus.FAILED
-                deployment.updated_at = datetime.datetime.utcnow()
-                deployment.metadata["error"] = str(e)
+                current.status = DeploymentStatus.FAILED
+                current.updated_at = datetime.datetime.utcnow()
+                current.metadata["error"] = str(e)
                 
                 # Save deployment
-                deployment_service.update_deployment(deployment)
+                deployment_service.update_deployment(current)
+                invalidate_response_cache("deployments")
         
-        # Start deployment thread
-        threading.Thread(target=deploy).start()
+        # Queue deployment on the bounded background pool
+        background_executor.submit(deploy)
         
-        return {
-            "id": deployment.id,
-            "name": deployment.name,
-            "model_id": deployment.model_id,
-            "model_type": deployment.model_type,
-            "deployment_type": deployment.deployment_type.value,
-            "status": deployment.status.value,
-            "endpoint": deployment.endpoint,
-            "resource_requirements": deployment.resource_requirements.dict(),
-            "scaling_policy": deployment.scaling_policy.dict(),
-            "cost_optimization_policy": deployment.cost_optimization_policy.dict(),
-            "created_at": deployment.created_at.isoformat(),
-            "updated_at": deployment.updated_at.isoformat(),
-            "metadata": deployment.metadata,
-        }
+        return _deployment_payload(deployment)
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/models-and-deployments", response_model=ModelWithDeploymentResponse)
+async def upload_model_with_deployment(
+    file: UploadFile = File(...),
+    model: str = Form(...),
+    deployment: str = Form(...),
+):
+    """Upload a model and create a deployment for it in a single request."""
+    try:
+        model_fields = json.loads(model)
+        deployment_fields = json.loads(deployment)
+        
+        # Validate the deployment before storing anything; the model ID is
+        # filled in once the upload has been saved
+        request = CreateDeploymentRequest(model_id="", **deployment_fields)
+        upload_kwargs = {
+            "name": model_fields["name"],
+            "framework": model_fields["framework"],
+            "version": model_fields["version"],
+            "metadata": json.dumps(model_fields.get("metadata", {})),
+        }
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Invalid JSON payload")
+    except (KeyError, TypeError, ValidationError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid request: {e}")
+    
+    uploaded = await upload_model(file=file, **upload_kwargs)
+    request.model_id = uploaded["model_id"]
+    
+    try:
+        created = await create_deployment(request)
+    except HTTPException:
+        # Don't leave an orphaned model behind if the deployment was rejected
+        await delete_model(uploaded["model_id"])
+        raise
+    
+    return {"model": uploaded, "deployment": created}
+
+
 @app.put("/deployments/{deployment_id}", response_model=DeploymentResponse)
 async def update_deployment(deployment_id: str, request: UpdateDeploymentRequest):
     """Update a deployment."""
@@ -618,6 +1131,7 @@ async def update_deployment(deployment_id: str, request: UpdateDeploymentRequest
                 hibernation_enabled=request.cost_optimization_policy.hibernation_enabled,
                 hibernation_idle_timeout=request.cost_optimization_policy.hibernation_idle_timeout,
                 multi_cloud_enabled=request.cost_optimization_policy.multi_cloud_enabled,
+                spot_allocation_strategy=request.cost_optimization_policy.spot_allocation_strategy,
             )
         
         if request.metadata:
@@ -627,22 +1141,9 @@ async def update_deployment(deployment_id: str, request: UpdateDeploymentRequest
         
         # Save deployment
         deployment_service.update_deployment(deployment)
+        invalidate_response_cache("deployments")
         
-        return {
-            "id": deployment.id,
-            "name": deployment.name,
-            "model_id": deployment.model_id,
-            "model_type": deployment.model_type,
-            "deployment_type": deployment.deployment_type.value,
-            "status": deployment.status.value,
-            "endpoint": deployment.endpoint,
-            "resource_requirements": deployment.resource_requirements.dict(),
-            "scaling_policy": deployment.scaling_policy.dict(),
-            "cost_optimization_policy": deployment.cost_optimization_policy.dict(),
-            "created_at": deployment.created_at.isoformat(),
-            "updated_at": deployment.updated_at.isoformat(),
-            "metadata": deployment.metadata,
-        }
+        return _deployment_payload(deployment)
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -659,6 +1160,7 @@ async def delete_deployment(deployment_id: str):
         
         # Delete deployment
         deployment_service.delete_deployment(deployment)
+        invalidate_response_cache("deployments")
         
         return {"message": f"Deployment {deployment_id} deleted successfully"}
     
@@ -685,6 +1187,7 @@ async def stop_deployment(deployment_id: str):
         
         # Save deployment
         deployment_service.update_deployment(deployment)
+        invalidate_response_cache("deployments")
         
         return {"message": f"Deployment {deployment_id} stopped successfully"}
     
@@ -711,14 +1214,13 @@ async def start_deployment(deployment_id: str):
         
         # Save deployment
         deployment_service.update_deployment(deployment)
+        invalidate_response_cache("deployments")
         
         # Start deployment in background
         # In a real implementation, this would be done asynchronously
         # For this implementation, we'll simulate deployment
         
         # Simulate deployment
-        import threading
-        
         def start():
             try:
                 # Simulate deployment delay
@@ -726,24 +1228,36 @@ async def start_deployment(deployment_id: str):
                 
                 time.sleep(5)
                 
+                # Reload by ID so changes made while this job was queued aren't
+                # overwritten, and skip it if the deployment has moved on
+                current = deployment_service.get_deployment(deployment_id)
+                if not current or current.status != DeploymentStatus.STARTING:
+                    return
+                
                 # Update deployment
-                deployment.status = DeploymentStatus.RUNNING
-                deployment.updated_at = datetime.datetime.utcnow()
+                current.status = DeploymentStatus.RUNNING
+                current.updated_at = datetime.datetime.utcnow()
                 
                 # Save deployment
-                deployment_service.update_deployment(deployment)
+                deployment_service.update_deployment(current)
+                invalidate_response_cache("deployments")
             
             except Exception as e:
+                current = deployment_service.get_deployment(deployment_id)
+                if not current:
+                    return
+                
                 # Update deployment with error
-                deployment.status = DeploymentStatus.FAILED
-                deployment.updated_at = datetime.datetime.utcnow()
-                deployment.metadata["error"] = str(e)
+                current.status = DeploymentStatus.FAILED
+                current.updated_at = datetime.datetime.utcnow()
+                current.metadata["error"] = str(e)
                 
                 # Save deployment
-                deployment_service.update_deployment(deployment)
+                deployment_service.update_deployment(current)
+                invalidate_response_cache("deployments")
         
-        # Start deployment thread
-        threading.Thread(target=start).start()
+        # Queue deployment on the bounded background pool
+        background_executor.submit(start)
         
         return {"message": f"Deployment {deployment_id} starting..."}
     
@@ -768,18 +1282,22 @@ async def get_deployment_metrics(
         
         # Parse time range
         try:
-            start = datetime.datetime.fromisoformat(start_time) if start_time else datetime.datetime.utcnow() - datetime.timedelta(hours=1)
-            end = datetime.datetime.fromisoformat(end_time) if end_time else datetime.datetime.utcnow()
+            now = datetime.datetime.utcnow()
+            start = datetime.datetime.fromisoformat(start_time) if start_time else now - datetime.timedelta(hours=1)
+            end = datetime.datetime.fromisoformat(end_time) if end_time else now
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid time format")
         
         # Get metrics
         try:
-            metrics_data = monitoring_service.get_metrics(deployment, metrics, start, end)
+            metrics_data = _cached_timeseries(
+                "metrics", monitoring_service.get_metrics, deployment, metrics, start, end
+            )
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to get metrics: {str(e)}")
         
-        return metrics_data
+        # Encode point by point on a worker thread rather than in one pass
+        return StreamingResponse(_stream_json(metrics_data), media_type="application/json")
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -801,18 +1319,22 @@ async def get_deployment_analytics(
         
         # Parse time range
         try:
-            start = datetime.datetime.fromisoformat(start_time) if start_time else datetime.datetime.utcnow() - datetime.timedelta(days=7)
-            end = datetime.datetime.fromisoformat(end_time) if end_time else datetime.datetime.utcnow()
+            now = datetime.datetime.utcnow()
+            start = datetime.datetime.fromisoformat(start_time) if start_time else now - datetime.timedelta(days=7)
+            end = datetime.datetime.fromisoformat(end_time) if end_time else now
         except ValueError:
             raise HTTPException(status_code=400, detail="Invalid time format")
         
         # Get analytics
         try:
-            analytics_data = analytics_service.get_analytics(deployment, metrics, start, end)
+            analytics_data = _cached_timeseries(
+                "analytics", analytics_service.get_analytics, deployment, metrics, start, end
+            )
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to get analytics: {str(e)}")
         
-        return analytics_data
+        # Encode point by point on a worker thread rather than in one pass
+        return StreamingResponse(_stream_json(analytics_data), media_type="application/json")
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -822,4 +1344,13 @@ async def get_deployment_analytics(
 if __name__ == "__main__":
     import uvicorn
     
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # A single worker on purpose: background jobs, the response cache and the
+    # deployment index all live in this process
+    uvicorn.run(
+        app,
+        host="0.0.0.0",
+        port=8000,
+        loop="uvloop",
+        http="httptools",
+        timeout_keep_alive=30,
+    )
@@ -6,7 +6,8 @@ This module provides functionality for deploying and managing AI models.
 import datetime
 import logging
 import os
-from typing import Dict, List, Optional, Union
+import threading
+from typing import Callable, Dict, List, Optional, Set, Union
 
 from core.models import (
     CostOptimizationPolicy,
@@ -46,6 +47,24 @@ class DeploymentService:
         self.serverless_deployer = serverless_deployer
         self.deployments_path = os.path.join(model_repository.storage_base_path, "deployments")
         os.makedirs(self.deployments_path, exist_ok=True)
+        
+        # Index of deployment IDs by model ID, so reference checks don't have
+        # to load every deployment from disk. It is built once and kept up to
+        # date as deployments are stored and deleted, under its lock since
+        # background deploy jobs update it.
+        self.deployments_by_model: Dict[str, Set[str]] = self._build_model_index()
+        self._model_index_lock = threading.Lock()
+        
+        # Callbacks run after a deployment is written or deleted
+        self._write_subscribers: List[Callable[[], None]] = []
+    
+    def subscribe_writes(self, callback: Callable[[], None]) -> None:
+        """Register a callback to run after a deployment is written or deleted.
+        
+        Args:
+            callback: Function called with no arguments after each write
+        """
+        self._write_subscribers.append(callback)
     
     def deploy_model(
         self,
@@ -84,7 +103,7 @@ class DeploymentService:
         
         # Update deployment status
         deployment.status = DeploymentStatus.DEPLOYING
-        self._save_deployment(deployment)
+        self._store_deployment(deployment)
         
         try:
             # Deploy model based on deployment type
@@ -105,7 +124,7 @@ class DeploymentService:
             deployment.endpoint = endpoint
             deployment.status = DeploymentStatus.ACTIVE
             deployment.updated_at = datetime.datetime.utcnow()
-            self._save_deployment(deployment)
+            self._store_deployment(deployment)
             
             logger.info(f"Deployed model {model.id} as {deployment.id} at {endpoint}")
             
@@ -116,7 +135,7 @@ class DeploymentService:
             deployment.status = DeploymentStatus.FAILED
             deployment.metadata["error"] = str(e)
             deployment.updated_at = datetime.datetime.utcnow()
-            self._save_deployment(deployment)
+            self._store_deployment(deployment)
             
             logger.error(f"Failed to deploy model {model.id}: {e}")
             raise
@@ -179,16 +198,32 @@ class DeploymentService:
         
         return Deployment.from_dict(deployment_data, model)
     
-    def list_deployments(self) -> List[Deployment]:
+    def list_deployments(self, status: Optional[DeploymentStatus] = None) -> List[Deployment]:
         """List all deployments.
         
+        Args:
+            status: Only list deployments with this status
+            
         Returns:
             List of deployments
         """
+        import json
+        
         deployments = []
         for filename in os.listdir(self.deployments_path):
             if filename.endswith(".json"):
                 deployment_id = filename[:-5]  # Remove ".json" suffix
+                
+                # Check the status on the raw record, so deployments that are
+                # filtered out never have their model loaded
+                if status is not None:
+                    try:
+                        with open(os.path.join(self.deployments_path, filename), "r") as f:
+                            if json.load(f)["status"] != status.value:
+                                continue
+                    except FileNotFoundError:
+                        continue
+                
                 deployment = self.get_deployment(deployment_id)
                 if deployment:
                     deployments.append(deployment)
@@ -234,7 +269,7 @@ class DeploymentService:
         # Update deployment status and timestamp
         deployment.status = DeploymentStatus.SCALING
         deployment.updated_at = datetime.datetime.utcnow()
-        self._save_deployment(deployment)
+        self._store_deployment(deployment)
         
         try:
             # Update deployment based on deployment type
@@ -248,7 +283,7 @@ class DeploymentService:
             # Update deployment status
             deployment.status = DeploymentStatus.ACTIVE
             deployment.updated_at = datetime.datetime.utcnow()
-            self._save_deployment(deployment)
+            self._store_deployment(deployment)
             
             logger.info(f"Updated deployment {deployment_id}")
             
@@ -259,7 +294,7 @@ class DeploymentService:
             deployment.status = DeploymentStatus.FAILED
             deployment.metadata["error"] = str(e)
             deployment.updated_at = datetime.datetime.utcnow()
-            self._save_deployment(deployment)
+            self._store_deployment(deployment)
             
             logger.error(f"Failed to update deployment {deployment_id}: {e}")
             raise
@@ -279,7 +314,7 @@ class DeploymentService:
         
         # Update deployment status
         deployment.status = DeploymentStatus.TERMINATING
-        self._save_deployment(deployment)
+        self._store_deployment(deployment)
         
         try:
             # Delete deployment based on deployment type
@@ -294,6 +329,8 @@ class DeploymentService:
             deployment_path = os.path.join(self.deployments_path, f"{deployment_id}.json")
             if os.path.exists(deployment_path):
                 os.remove(deployment_path)
+            self._unindex_deployment(deployment)
+            self._notify_writes()
             
             logger.info(f"Deleted deployment {deployment_id}")
             
@@ -304,7 +341,7 @@ class DeploymentService:
             deployment.status = DeploymentStatus.FAILED
             deployment.metadata["error"] = str(e)
             deployment.updated_at = datetime.datetime.utcnow()
-            self._save_deployment(deployment)
+            self._store_deployment(deployment)
             
             logger.error(f"Failed to delete deployment {deployment_id}: {e}")
             raise
@@ -330,7 +367,7 @@ class DeploymentService:
         # Update deployment status
         deployment.status = DeploymentStatus.HIBERNATED
         deployment.updated_at = datetime.datetime.utcnow()
-        self._save_deployment(deployment)
+        self._store_deployment(deployment)
         
         try:
             # Hibernate deployment based on deployment type
@@ -350,7 +387,7 @@ class DeploymentService:
             deployment.status = DeploymentStatus.FAILED
             deployment.metadata["error"] = str(e)
             deployment.updated_at = datetime.datetime.utcnow()
-            self._save_deployment(deployment)
+            self._store_deployment(deployment)
             
             logger.error(f"Failed to hibernate deployment {deployment_id}: {e}")
             raise
@@ -376,7 +413,7 @@ class DeploymentService:
         # Update deployment status
         deployment.status = DeploymentStatus.DEPLOYING
         deployment.updated_at = datetime.datetime.utcnow()
-        self._save_deployment(deployment)
+        self._store_deployment(deployment)
         
         try:
             # Activate deployment based on deployment type
@@ -391,7 +428,7 @@ class DeploymentService:
             deployment.status = DeploymentStatus.ACTIVE
             deployment.updated_at = datetime.datetime.utcnow()
             deployment.last_active_at = datetime.datetime.utcnow()
-            self._save_deployment(deployment)
+            self._store_deployment(deployment)
             
             logger.info(f"Activated deployment {deployment_id}")
             
@@ -402,11 +439,89 @@ class DeploymentService:
             deployment.status = DeploymentStatus.FAILED
             deployment.metadata["error"] = str(e)
             deployment.updated_at = datetime.datetime.utcnow()
-            self._save_deployment(deployment)
+            self._store_deployment(deployment)
             
             logger.error(f"Failed to activate deployment {deployment_id}: {e}")
             raise
     
+    def _build_model_index(self) -> Dict[str, Set[str]]:
+        """Build the model ID to deployment IDs index from stored deployments.
+        
+        Returns:
+            Dictionary mapping model IDs to the IDs of deployments using them
+        """
+        import json
+        
+        index: Dict[str, Set[str]] = {}
+        for filename in os.listdir(self.deployments_path):
+            if not filename.endswith(".json"):
+                continue
+            
+            try:
+                with open(os.path.join(self.deployments_path, filename), "r") as f:
+                    deployment_data = json.load(f)
+                model_id = deployment_data["model_id"]
+                deployment_id = deployment_data["id"]
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logger.warning(f"Skipping unreadable deployment file {filename}: {e}")
+                continue
+            
+            index.setdefault(model_id, set()).add(deployment_id)
+        
+        return index
+    
+    def get_deployment_ids_for_model(self, model_id: str) -> Set[str]:
+        """Get the IDs of the stored deployments that use a model.
+        
+        Args:
+            model_id: ID of the model
+            
+        Returns:
+            IDs of the deployments using the model
+        """
+        with self._model_index_lock:
+            return set(self.deployments_by_model.get(model_id, ()))
+    
+    def _store_deployment(self, deployment: Deployment) -> None:
+        """Save deployment metadata to disk and record it in the model index.
+        
+        Args:
+            deployment: Deployment to store
+        """
+        self._save_deployment(deployment)
+        self._index_deployment(deployment)
+        self._notify_writes()
+    
+    def _notify_writes(self) -> None:
+        """Run the write subscribers, logging instead of raising their errors."""
+        for callback in self._write_subscribers:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Error in deployment write subscriber: {e}")
+    
+    def _index_deployment(self, deployment: Deployment) -> None:
+        """Record a deployment in the model index.
+        
+        Args:
+            deployment: Deployment to index
+        """
+        with self._model_index_lock:
+            self.deployments_by_model.setdefault(deployment.model_id, set()).add(deployment.id)
+    
+    def _unindex_deployment(self, deployment: Deployment) -> None:
+        """Remove a deployment from the model index.
+        
+        Args:
+            deployment: Deployment to remove
+        """
+        with self._model_index_lock:
+            deployment_ids = self.deployments_by_model.get(deployment.model_id)
+            if deployment_ids is not None:
+                deployment_ids.discard(deployment.id)
+                if not deployment_ids:
+                    del self.deployments_by_model[deployment.model_id]
+    
     def _save_deployment(self, deployment: Deployment) -> None:
         """Save deployment metadata to disk.
         
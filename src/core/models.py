@@ -5,6 +5,7 @@ This module defines the data models for AI models, deployments, and related enti
 
 import datetime
 import enum
+import functools
 import uuid
 from typing import Dict, List, Optional, Union
 
@@ -55,6 +56,13 @@ class DeploymentStatus(str, enum.Enum):
     TERMINATED = "terminated"
 
 
+class SpotAllocationStrategy(str, enum.Enum):
+    """Strategies for choosing spot/preemptible capacity."""
+    LOWEST_PRICE = "lowest-price"
+    CAPACITY_OPTIMIZED = "capacity-optimized"
+    PRICE_CAPACITY_OPTIMIZED = "price-capacity-optimized"
+
+
 class Model:
     """Represents an AI model in the platform."""
     
@@ -163,6 +171,36 @@ class OptimizedModel:
         return optimized_model
 
 
+# Binary and decimal memory units in GiB. Quantities without a unit are GiB.
+_MEMORY_UNITS_GIB = {
+    "Ki": 1 / 1024 ** 2,
+    "Mi": 1 / 1024,
+    "Gi": 1.0,
+    "Ti": 1024.0,
+    "K": 1e3 / 1024 ** 3,
+    "M": 1e6 / 1024 ** 3,
+    "G": 1e9 / 1024 ** 3,
+    "T": 1e12 / 1024 ** 3,
+}
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_memory_gib(memory: str) -> float:
+    """Parse a memory quantity such as "512Mi" or "2Gi" into GiB."""
+    for suffix in ("Ki", "Mi", "Gi", "Ti", "K", "M", "G", "T"):
+        if memory.endswith(suffix):
+            return float(memory[: -len(suffix)]) * _MEMORY_UNITS_GIB[suffix]
+    return float(memory)
+
+
+@functools.lru_cache(maxsize=1024)
+def _parse_cpu_cores(cpu: str) -> float:
+    """Parse a CPU quantity such as "100m" or "2" into cores."""
+    if cpu.endswith("m"):
+        return float(cpu[:-1]) / 1000
+    return float(cpu)
+
+
 class ResourceRequirements:
     """Represents resource requirements for a deployment."""
     
@@ -178,6 +216,16 @@ class ResourceRequirements:
         self.gpu = gpu
         self.storage = storage
     
+    @property
+    def cpu_cores(self) -> float:
+        """CPU requirement in cores."""
+        return _parse_cpu_cores(str(self.cpu))
+    
+    @property
+    def memory_gib(self) -> float:
+        """Memory requirement in GiB."""
+        return _parse_memory_gib(str(self.memory))
+    
     def to_dict(self) -> Dict:
         """Convert resource requirements to dictionary representation."""
         return {
@@ -242,11 +290,13 @@ class CostOptimizationPolicy:
         hibernation_enabled: bool = True,
         multi_cloud_arbitrage: bool = False,
         storage_tiering: bool = True,
+        spot_allocation_strategy: SpotAllocationStrategy = SpotAllocationStrategy.LOWEST_PRICE,
     ):
         self.use_spot_instances = use_spot_instances
         self.hibernation_enabled = hibernation_enabled
         self.multi_cloud_arbitrage = multi_cloud_arbitrage
         self.storage_tiering = storage_tiering
+        self.spot_allocation_strategy = SpotAllocationStrategy(spot_allocation_strategy)
     
     def to_dict(self) -> Dict:
         """Convert cost optimization policy to dictionary representation."""
@@ -255,6 +305,7 @@ class CostOptimizationPolicy:
             "hibernation_enabled": self.hibernation_enabled,
             "multi_cloud_arbitrage": self.multi_cloud_arbitrage,
             "storage_tiering": self.storage_tiering,
+            "spot_allocation_strategy": self.spot_allocation_strategy.value,
         }
     
     @classmethod
@@ -265,6 +316,7 @@ class CostOptimizationPolicy:
             hibernation_enabled=data.get("hibernation_enabled", True),
             multi_cloud_arbitrage=data.get("multi_cloud_arbitrage", False),
             storage_tiering=data.get("storage_tiering", True),
+            spot_allocation_strategy=data.get("spot_allocation_strategy", SpotAllocationStrategy.LOWEST_PRICE),
         )
 
 
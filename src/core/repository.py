@@ -3,13 +3,97 @@ Model repository for storing and retrieving AI models.
 This module provides functionality for managing model storage and retrieval.
 """
 
+import errno
 import json
+import logging
 import os
 import shutil
-from typing import Dict, List, Optional, Union
+import threading
+from typing import Callable, Dict, List, Optional, Union
 
 from core.models import Model, OptimizedModel
 
+try:
+    import orjson
+    
+    _json_loads = orjson.loads
+    
+    def _json_dumps(data: Dict) -> bytes:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+except ImportError:
+    _json_loads = json.loads
+    
+    def _json_dumps(data: Dict) -> bytes:
+        return json.dumps(data).encode()
+
+logger = logging.getLogger(__name__)
+
+# Metadata file names are <prefix><id>.json
+_MODEL_PREFIX = "model_"
+_OPTIMIZED_MODEL_PREFIX = "optimized_model_"
+_JSON_SUFFIX = ".json"
+_MODEL_PREFIX_LEN = len(_MODEL_PREFIX)
+_JSON_SUFFIX_LEN = len(_JSON_SUFFIX)
+
+# Bytes requested per copy_file_range/sendfile call when copying model files
+COPY_CHUNK_SIZE = 1 << 30
+
+# Buffer size for copying model files through userspace when the kernel
+# copy calls aren't supported
+FALLBACK_COPY_BUFFER_SIZE = 1 << 20
+
+# Errors meaning a kernel copy call isn't supported for this pair of files
+_UNSUPPORTED_COPY_ERRNOS = (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSUP)
+
+
+def _atomic_write_bytes(path: str, data: bytes) -> None:
+    """Write a file so readers see either the old or the new contents, never a partial one.
+    
+    The data is written to a temporary file next to the target with as few
+    write calls as possible and then renamed over it.
+    
+    Args:
+        path: Path of the file to write
+        data: Contents to write
+    """
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+    os.replace(tmp_path, path)
+
+
+def _kernel_copy(copy_chunk: Callable[[int], int]) -> bool:
+    """Copy a file with a kernel copy call until it reports end of file.
+    
+    Args:
+        copy_chunk: Copies up to the given number of bytes at the current
+            offset and returns the number copied
+        
+    Returns:
+        True if the file was copied, False if the call isn't supported or
+        copied nothing
+    """
+    copied_any = False
+    while True:
+        try:
+            copied = copy_chunk(COPY_CHUNK_SIZE)
+        except OSError as e:
+            # Unsupported calls fail on the first chunk; anything later is real
+            if copied_any or e.errno not in _UNSUPPORTED_COPY_ERRNOS:
+                raise
+            return False
+        # Some filesystems report unsupported copies as end of file, so a
+        # first call copying nothing falls back to the next method; a
+        # genuinely empty file is copied just as well by the fallback
+        if copied == 0:
+            return copied_any
+        copied_any = True
+
 
 class ModelRepository:
     """Repository for storing and retrieving AI models."""
@@ -25,10 +109,32 @@ class ModelRepository:
         self.optimized_models_path = os.path.join(storage_base_path, "optimized_models")
         self.metadata_path = os.path.join(storage_base_path, "metadata")
         
+        # Optimized model metadata is stored in one directory per original
+        # model, so listing a model's optimized versions only reads its own
+        self.optimized_metadata_path = os.path.join(self.metadata_path, "by_original")
+        
         # Create directories if they don't exist
         os.makedirs(self.models_path, exist_ok=True)
         os.makedirs(self.optimized_models_path, exist_ok=True)
         os.makedirs(self.metadata_path, exist_ok=True)
+        os.makedirs(self.optimized_metadata_path, exist_ok=True)
+        
+        # Parsed metadata files keyed by path, with the (mtime, size) they were
+        # read at so changes made by other processes are picked up
+        self._metadata_cache: Dict[str, tuple] = {}
+        
+        # Callbacks run after model or optimized model metadata is written or deleted
+        self._write_subscribers: List[Callable[[], None]] = []
+        
+        self._shard_optimized_model_metadata()
+    
+    def subscribe_writes(self, callback: Callable[[], None]) -> None:
+        """Register a callback to run after model metadata is written or deleted.
+        
+        Args:
+            callback: Function called with no arguments after each write
+        """
+        self._write_subscribers.append(callback)
     
     def save_model(self, model: Model, model_file_path: str) -> Model:
         """Save a model to the repository.
@@ -47,7 +153,7 @@ class ModelRepository:
         # Copy model file to repository
         model_filename = os.path.basename(model_file_path)
         model_storage_path = os.path.join(model_dir, model_filename)
-        shutil.copy2(model_file_path, model_storage_path)
+        self._fastcopy(model_file_path, model_storage_path)
         
         # Update model with storage path
         model.storage_path = model_storage_path
@@ -75,7 +181,7 @@ class ModelRepository:
         # Copy model file to repository
         model_filename = os.path.basename(model_file_path)
         model_storage_path = os.path.join(optimized_model_dir, model_filename)
-        shutil.copy2(model_file_path, model_storage_path)
+        self._fastcopy(model_file_path, model_storage_path)
         
         # Update optimized model with storage path
         optimized_model.storage_path = model_storage_path
@@ -95,13 +201,10 @@ class ModelRepository:
         Returns:
             Model if found, None otherwise
         """
-        metadata_path = os.path.join(self.metadata_path, f"model_{model_id}.json")
-        if not os.path.exists(metadata_path):
+        model_data = self._load_metadata(os.path.join(self.metadata_path, f"model_{model_id}.json"))
+        if model_data is None:
             return None
         
-        with open(metadata_path, "r") as f:
-            model_data = json.load(f)
-        
         return Model.from_dict(model_data)
     
     def get_optimized_model(self, optimized_model_id: str, original_model: Model) -> Optional[OptimizedModel]:
@@ -114,13 +217,12 @@ class ModelRepository:
         Returns:
             OptimizedModel if found, None otherwise
         """
-        metadata_path = os.path.join(self.metadata_path, f"optimized_model_{optimized_model_id}.json")
-        if not os.path.exists(metadata_path):
+        optimized_model_data = self._load_metadata(
+            self._optimized_model_metadata_path(original_model.id, optimized_model_id)
+        )
+        if optimized_model_data is None:
             return None
         
-        with open(metadata_path, "r") as f:
-            optimized_model_data = json.load(f)
-        
         return OptimizedModel.from_dict(optimized_model_data, original_model)
     
     def list_models(self) -> List[Model]:
@@ -130,12 +232,14 @@ class ModelRepository:
             List of models
         """
         models = []
-        for filename in os.listdir(self.metadata_path):
-            if filename.startswith("model_") and filename.endswith(".json"):
-                model_id = filename[6:-5]  # Remove "model_" prefix and ".json" suffix
-                model = self.get_model(model_id)
-                if model:
-                    models.append(model)
+        with os.scandir(self.metadata_path) as entries:
+            for entry in entries:
+                name = entry.name
+                if name.startswith(_MODEL_PREFIX) and name.endswith(_JSON_SUFFIX) and entry.is_file():
+                    model_id = name[_MODEL_PREFIX_LEN:-_JSON_SUFFIX_LEN]
+                    model = self.get_model(model_id)
+                    if model:
+                        models.append(model)
         return models
     
     def list_optimized_models(self, original_model: Model) -> List[OptimizedModel]:
@@ -148,15 +252,10 @@ class ModelRepository:
             List of optimized models
         """
         optimized_models = []
-        for filename in os.listdir(self.metadata_path):
-            if filename.startswith("optimized_model_") and filename.endswith(".json"):
-                optimized_model_id = filename[16:-5]  # Remove "optimized_model_" prefix and ".json" suffix
-                with open(os.path.join(self.metadata_path, filename), "r") as f:
-                    optimized_model_data = json.load(f)
-                
-                if optimized_model_data["original_model_id"] == original_model.id:
-                    optimized_model = OptimizedModel.from_dict(optimized_model_data, original_model)
-                    optimized_models.append(optimized_model)
+        for optimized_model_id in self._list_optimized_model_ids(original_model.id):
+            optimized_model = self.get_optimized_model(optimized_model_id, original_model)
+            if optimized_model:
+                optimized_models.append(optimized_model)
         
         return optimized_models
     
@@ -180,19 +279,20 @@ class ModelRepository:
         
         # Delete model metadata
         metadata_path = os.path.join(self.metadata_path, f"model_{model_id}.json")
+        self._metadata_cache.pop(metadata_path, None)
         if os.path.exists(metadata_path):
             os.remove(metadata_path)
         
         # Delete associated optimized models
-        for filename in os.listdir(self.metadata_path):
-            if filename.startswith("optimized_model_") and filename.endswith(".json"):
-                with open(os.path.join(self.metadata_path, filename), "r") as f:
-                    optimized_model_data = json.load(f)
-                
-                if optimized_model_data["original_model_id"] == model_id:
-                    optimized_model_id = filename[16:-5]
-                    self.delete_optimized_model(optimized_model_id)
+        for optimized_model_id in self._list_optimized_model_ids(model_id):
+            self.delete_optimized_model(optimized_model_id)
         
+        try:
+            os.rmdir(os.path.join(self.optimized_metadata_path, model_id))
+        except FileNotFoundError:
+            pass
+        
+        self._notify_writes()
         return True
     
     def delete_optimized_model(self, optimized_model_id: str) -> bool:
@@ -209,13 +309,59 @@ class ModelRepository:
         if os.path.exists(optimized_model_dir):
             shutil.rmtree(optimized_model_dir)
         
-        # Delete optimized model metadata
-        metadata_path = os.path.join(self.metadata_path, f"optimized_model_{optimized_model_id}.json")
-        if os.path.exists(metadata_path):
+        # Delete optimized model metadata, found through the link at its
+        # flat path since only the ID is known here
+        link_path = os.path.join(self.metadata_path, f"optimized_model_{optimized_model_id}.json")
+        if not os.path.islink(link_path):
+            return False
+        
+        metadata_path = os.path.normpath(os.path.join(self.metadata_path, os.readlink(link_path)))
+        self._metadata_cache.pop(metadata_path, None)
+        os.remove(link_path)
+        deleted = os.path.exists(metadata_path)
+        if deleted:
             os.remove(metadata_path)
-            return True
         
-        return False
+        # Notify only once the metadata is gone, so a read triggered by the
+        # notification can't see the deleted model
+        self._notify_writes()
+        return deleted
+    
+    def _fastcopy(self, src: str, dst: str) -> None:
+        """Copy a model file and its permissions and timestamps, like shutil.copy2.
+        
+        The data is copied with os.copy_file_range where possible, which stays
+        in the kernel and can reflink or copy server-side on filesystems that
+        support it, then with os.sendfile, and only then through userspace.
+        
+        Args:
+            src: Path of the file to copy
+            dst: Destination path
+        """
+        with open(src, "rb", buffering=0) as fsrc, open(dst, "wb", buffering=0) as fdst:
+            src_fd, dst_fd = fsrc.fileno(), fdst.fileno()
+            offset = 0
+            
+            def sendfile_chunk(count: int) -> int:
+                nonlocal offset
+                sent = os.sendfile(dst_fd, src_fd, offset, count)
+                offset += sent
+                return sent
+            
+            copied = hasattr(os, "copy_file_range") and _kernel_copy(
+                lambda count: os.copy_file_range(src_fd, dst_fd, count)
+            )
+            if not copied:
+                copied = hasattr(os, "sendfile") and _kernel_copy(sendfile_chunk)
+            if not copied:
+                buffer = bytearray(FALLBACK_COPY_BUFFER_SIZE)
+                view = memoryview(buffer)
+                while length := fsrc.readinto(buffer):
+                    chunk = view[:length]
+                    while chunk:
+                        chunk = chunk[fdst.write(chunk):]
+        
+        shutil.copystat(src, dst)
     
     def _save_model_metadata(self, model: Model) -> None:
         """Save model metadata to disk.
@@ -224,8 +370,10 @@ class ModelRepository:
             model: Model to save metadata for
         """
         metadata_path = os.path.join(self.metadata_path, f"model_{model.id}.json")
-        with open(metadata_path, "w") as f:
-            json.dump(model.to_dict(), f, indent=2)
+        model_data = model.to_dict()
+        _atomic_write_bytes(metadata_path, _json_dumps(model_data))
+        self._cache_metadata(metadata_path, model_data)
+        self._notify_writes()
     
     def _save_optimized_model_metadata(self, optimized_model: OptimizedModel) -> None:
         """Save optimized model metadata to disk.
@@ -233,6 +381,124 @@ class ModelRepository:
         Args:
             optimized_model: Optimized model to save metadata for
         """
-        metadata_path = os.path.join(self.metadata_path, f"optimized_model_{optimized_model.id}.json")
-        with open(metadata_path, "w") as f:
-            json.dump(optimized_model.to_dict(), f, indent=2)
+        optimized_model_data = optimized_model.to_dict()
+        metadata_path = self._optimized_model_metadata_path(
+            optimized_model_data["original_model_id"], optimized_model.id
+        )
+        os.makedirs(os.path.dirname(metadata_path), exist_ok=True)
+        _atomic_write_bytes(metadata_path, _json_dumps(optimized_model_data))
+        self._cache_metadata(metadata_path, optimized_model_data)
+        self._link_optimized_model_metadata(optimized_model.id, metadata_path)
+        self._notify_writes()
+    
+    def _notify_writes(self) -> None:
+        """Run the write subscribers, logging instead of raising their errors."""
+        for callback in self._write_subscribers:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"Error in model write subscriber: {e}")
+    
+    def _optimized_model_metadata_path(self, original_model_id: str, optimized_model_id: str) -> str:
+        """Get the metadata path of an optimized model.
+        
+        Args:
+            original_model_id: ID of the original model
+            optimized_model_id: ID of the optimized model
+            
+        Returns:
+            Path to the optimized model's metadata file
+        """
+        return os.path.join(self.optimized_metadata_path, original_model_id, f"{optimized_model_id}.json")
+    
+    def _list_optimized_model_ids(self, original_model_id: str) -> List[str]:
+        """List the IDs of a model's optimized versions without reading their metadata.
+        
+        Args:
+            original_model_id: ID of the original model
+            
+        Returns:
+            List of optimized model IDs
+        """
+        try:
+            with os.scandir(os.path.join(self.optimized_metadata_path, original_model_id)) as entries:
+                return [entry.name[:-_JSON_SUFFIX_LEN] for entry in entries if entry.name.endswith(_JSON_SUFFIX)]
+        except FileNotFoundError:
+            return []
+    
+    def _link_optimized_model_metadata(self, optimized_model_id: str, metadata_path: str) -> None:
+        """Point the flat optimized_model_<id>.json path at the sharded metadata file.
+        
+        The link keeps the old layout readable and lets optimized models be
+        found by ID alone.
+        
+        Args:
+            optimized_model_id: ID of the optimized model
+            metadata_path: Path to the sharded metadata file
+        """
+        link_path = os.path.join(self.metadata_path, f"optimized_model_{optimized_model_id}.json")
+        if os.path.islink(link_path):
+            return
+        
+        if os.path.exists(link_path):
+            os.remove(link_path)
+        os.symlink(os.path.relpath(metadata_path, self.metadata_path), link_path)
+    
+    def _shard_optimized_model_metadata(self) -> None:
+        """Move optimized model metadata from the flat layout into per-model directories."""
+        with os.scandir(self.metadata_path) as entries:
+            flat_files = [
+                entry.path for entry in entries
+                if entry.name.startswith(_OPTIMIZED_MODEL_PREFIX) and entry.name.endswith(_JSON_SUFFIX)
+                and not entry.is_symlink()
+            ]
+        
+        for flat_path in flat_files:
+            with open(flat_path, "rb") as f:
+                optimized_model_data = _json_loads(f.read())
+            
+            metadata_path = self._optimized_model_metadata_path(
+                optimized_model_data["original_model_id"], optimized_model_data["id"]
+            )
+            os.makedirs(os.path.dirname(metadata_path), exist_ok=True)
+            os.replace(flat_path, metadata_path)
+            self._link_optimized_model_metadata(optimized_model_data["id"], metadata_path)
+    
+    def _load_metadata(self, metadata_path: str) -> Optional[Dict]:
+        """Load a metadata file, reusing the parsed copy while the file is unchanged.
+        
+        Args:
+            metadata_path: Path to the metadata file
+            
+        Returns:
+            Metadata with its own copy of the "metadata" dict, or None if the
+            file doesn't exist
+        """
+        try:
+            stat = os.stat(metadata_path)
+        except FileNotFoundError:
+            self._metadata_cache.pop(metadata_path, None)
+            return None
+        
+        version = (stat.st_mtime_ns, stat.st_size)
+        cached = self._metadata_cache.get(metadata_path)
+        if cached and cached[0] == version:
+            data = cached[1]
+        else:
+            with open(metadata_path, "rb") as f:
+                data = _json_loads(f.read())
+            self._metadata_cache[metadata_path] = (version, data)
+        
+        # Callers mutate model metadata in place, so don't hand out the cached dict
+        return {**data, "metadata": dict(data.get("metadata", {}))}
+    
+    def _cache_metadata(self, metadata_path: str, data: Dict) -> None:
+        """Record metadata that was just written so the next read skips parsing.
+        
+        Args:
+            metadata_path: Path the metadata was written to
+            data: Metadata that was written
+        """
+        stat = os.stat(metadata_path)
+        data = {**data, "metadata": dict(data.get("metadata", {}))}
+        self._metadata_cache[metadata_path] = ((stat.st_mtime_ns, stat.st_size), data)
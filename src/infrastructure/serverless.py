@@ -277,7 +277,7 @@ class ServerlessDeployer:
         # For this implementation, we'll just log the update
         
         # Convert memory to MB (AWS Lambda memory is specified in MB)
-        memory_mb = int(float(deployment.resource_requirements.memory.rstrip("Gi")) * 1024)
+        memory_mb = int(deployment.resource_requirements.memory_gib * 1024)
         
         # Convert CPU to vCPU (AWS Lambda CPU is tied to memory)
         # AWS Lambda allocates CPU power proportional to the memory configured
@@ -115,7 +115,14 @@ def main():
     logger.info(f"Starting API server on {args.host}:{args.port}")
     import uvicorn
     
-    uvicorn.run(app, host=args.host, port=args.port)
+    uvicorn.run(
+        app,
+        host=args.host,
+        port=args.port,
+        loop="uvloop",
+        http="httptools",
+        timeout_keep_alive=30,
+    )
 
 
 if __name__ == "__main__":
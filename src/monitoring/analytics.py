@@ -7,6 +7,7 @@ import datetime
 import json
 import logging
 import os
+import time
 import numpy as np
 import pandas as pd
 from typing import Dict, List, Optional, Tuple, Union
@@ -17,6 +18,22 @@ from monitoring.monitoring import MonitoringService
 
 logger = logging.getLogger(__name__)
 
+# Last formatted timestamp as (epoch milliseconds, ISO string)
+_last_ts = (0, "")
+
+
+def _iso_now() -> str:
+    """Get the current UTC time in ISO format, cached at millisecond resolution.
+    
+    Returns:
+        Current UTC time (ISO format)
+    """
+    global _last_ts
+    ms = time.time_ns() // 1_000_000
+    if ms != _last_ts[0]:
+        _last_ts = (ms, datetime.datetime.utcfromtimestamp(ms / 1000).isoformat())
+    return _last_ts[1]
+
 
 class AnalyticsService:
     """Service for analyzing deployment metrics and generating insights."""
@@ -113,7 +130,7 @@ class AnalyticsService:
         
         # Save analysis results
         analysis_results = {
-            "timestamp": datetime.datetime.utcnow().isoformat(),
+            "timestamp": _iso_now(),
             "start_time": start_time,
             "end_time": end_time,
             "total_cost": total_cost,
@@ -229,7 +246,7 @@ class AnalyticsService:
         
         # Save analysis results
         analysis_results = {
-            "timestamp": datetime.datetime.utcnow().isoformat(),
+            "timestamp": _iso_now(),
             "start_time": start_time,
             "end_time": end_time,
             "total_requests": total_requests,
@@ -312,7 +329,7 @@ class AnalyticsService:
         
         # Save forecast results
         forecast_results = {
-            "timestamp": datetime.datetime.utcnow().isoformat(),
+            "timestamp": _iso_now(),
             "start_time": start_time,
             "end_time": end_time,
             "days": days,
@@ -372,7 +389,7 @@ class AnalyticsService:
         
         # Save suggestions
         suggestions_results = {
-            "timestamp": datetime.datetime.utcnow().isoformat(),
+            "timestamp": _iso_now(),
             "suggestions_by_deployment": suggestions_by_deployment,
         }
         
@@ -3,20 +3,80 @@ Monitoring service for the AI model deployment platform.
 This module provides functionality for monitoring deployments and collecting metrics.
 """
 
+import bisect
 import datetime
 import json
 import logging
 import os
-import random
-import time
-from typing import Dict, List, Optional, Tuple, Union
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
 
 from core.deployment import DeploymentService
 from core.models import Deployment, DeploymentStatus, DeploymentType
 from core.repository import ModelRepository
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# Number of metrics samples kept per deployment
+MAX_METRICS_PER_DEPLOYMENT = 1000
+
+# A deployment's metrics file is trimmed back to MAX_METRICS_PER_DEPLOYMENT
+# samples once it grows past this many, so trimming doesn't run on every write
+METRICS_COMPACT_THRESHOLD = 1200
+
+# Threads used to collect metrics for several deployments at once. Collection
+# is I/O-bound (metrics files and, in a real deployment, cloud APIs)
+COLLECTION_WORKERS = min(32, (os.cpu_count() or 4) * 4)
+
+
+# Simulated readings drawn per batch; one batch covers many collections
+SIMULATION_BATCH_SIZE = 1024
+
+
+class SimulatedReading(NamedTuple):
+    """Simulated resource and request readings for one deployment."""
+    
+    cpu_utilization: float
+    memory_utilization: float
+    request_count: int
+    avg_latency: float  # ms
+    error_rate: float
+
+
+# Figures taken from each metrics sample for the cost and performance summaries
+METRIC_COLUMNS = ("total_cost", "compute", "storage", "network", "requests", "latency", "errors")
+
+
+def _metric_row(metrics: Dict) -> Tuple[float, ...]:
+    """Extract a metrics sample's cost and request figures, in METRIC_COLUMNS order.
+    
+    Args:
+        metrics: Metrics sample
+        
+    Returns:
+        Figures for the sample, 0 where a figure wasn't recorded
+    """
+    cost = metrics.get("cost", {})
+    requests = metrics.get("requests", {})
+    return (
+        cost.get("total", 0),
+        cost.get("compute", 0),
+        cost.get("storage", 0),
+        cost.get("network", 0),
+        requests.get("count", 0),
+        requests.get("total_latency", 0),
+        requests.get("errors", 0),
+    )
+
 
 class MonitoringService:
     """Service for monitoring deployments and collecting metrics."""
@@ -44,9 +104,35 @@ class MonitoringService:
         # Create metrics directory if it doesn't exist
         os.makedirs(metrics_path, exist_ok=True)
         
-        # Initialize metrics tracking
+        # Initialize metrics tracking. Each deployment's samples are appended
+        # to their own JSON Lines file, so recording a sample is one write
         self.metrics_tracking_path = os.path.join(metrics_path, "metrics_tracking.json")
+        self.deployment_metrics_path = os.path.join(metrics_path, "deployments")
+        self._metrics_index: Dict[str, Tuple[List[str], List[int]]] = {}
+        self._metrics_file_sizes: Dict[str, int] = {}
+        
+        # Per-deployment locks serializing appends, compaction and index
+        # access for a deployment's metrics file
+        self._metrics_locks: Dict[str, threading.Lock] = {}
+        self._metrics_locks_lock = threading.Lock()
         self._init_metrics_tracking()
+        
+        self._executor = ThreadPoolExecutor(
+            max_workers=COLLECTION_WORKERS,
+            thread_name_prefix="metrics-collection",
+        )
+        
+        # Simulated readings are drawn from numpy in batches rather than with
+        # several random module calls per collection
+        self._rng = np.random.default_rng()
+        self._simulated_readings: List[SimulatedReading] = []
+        self._simulation_lock = threading.Lock()
+        
+        # Metrics collectors for active deployments, by deployment type
+        self._collectors = {
+            DeploymentType.KUBERNETES: self._collect_kubernetes_deployment_metrics,
+            DeploymentType.SERVERLESS: self._collect_serverless_deployment_metrics,
+        }
     
     def collect_metrics(self) -> Dict[str, Dict]:
         """Collect metrics for all deployments.
@@ -59,15 +145,22 @@ class MonitoringService:
         # Get all deployments
         deployments = self.deployment_service.list_deployments()
         
-        # Collect metrics for each deployment
+        # Collect metrics for all deployments concurrently. Each deployment
+        # writes only to its own metrics file, and all samples from one cycle
+        # share a timestamp
+        timestamp = datetime.datetime.utcnow().isoformat()
+        futures = {
+            deployment.id: self._executor.submit(self._collect_deployment_metrics, deployment, timestamp)
+            for deployment in deployments
+        }
+        
         results = {}
-        for deployment in deployments:
+        for deployment_id, future in futures.items():
             try:
-                metrics = self.collect_deployment_metrics(deployment.id)
-                results[deployment.id] = metrics
+                results[deployment_id] = future.result()
             except Exception as e:
-                logger.error(f"Error collecting metrics for deployment {deployment.id}: {e}")
-                results[deployment.id] = {"error": str(e)}
+                logger.exception("Error collecting metrics for deployment %s", deployment_id)
+                results[deployment_id] = {"error": str(e)}
         
         return results
     
@@ -80,45 +173,59 @@ class MonitoringService:
         Returns:
             Collected metrics
         """
-        logger.info(f"Collecting metrics for deployment {deployment_id}")
-        
         # Get deployment
         deployment = self.deployment_service.get_deployment(deployment_id)
         if not deployment:
             raise ValueError(f"Deployment {deployment_id} not found")
         
+        return self._collect_deployment_metrics(deployment, datetime.datetime.utcnow().isoformat())
+    
+    def _collect_deployment_metrics(self, deployment: Deployment, timestamp: str) -> Dict:
+        """Collect and save metrics for a deployment.
+        
+        Args:
+            deployment: Deployment to collect metrics for
+            timestamp: Timestamp to record the metrics under (ISO format)
+            
+        Returns:
+            Collected metrics
+        """
+        logger.info("Collecting metrics for deployment %s", deployment.id)
+        
+        status = deployment.status
+        
         # Skip deployments that are not active or hibernated
-        if deployment.status not in [DeploymentStatus.ACTIVE, DeploymentStatus.HIBERNATED]:
+        if status is not DeploymentStatus.ACTIVE and status is not DeploymentStatus.HIBERNATED:
             return {
                 "status": "skipped",
-                "reason": f"Deployment is {deployment.status.value}",
-                "timestamp": datetime.datetime.utcnow().isoformat(),
+                "reason": f"Deployment is {status.value}",
+                "timestamp": timestamp,
             }
         
         # Collect metrics based on deployment type
-        if deployment.status == DeploymentStatus.HIBERNATED:
+        if status is DeploymentStatus.HIBERNATED:
             # For hibernated deployments, only collect basic metrics
-            metrics = self._collect_hibernated_deployment_metrics(deployment)
-        elif deployment.deployment_type == DeploymentType.KUBERNETES:
-            metrics = self._collect_kubernetes_deployment_metrics(deployment)
-        elif deployment.deployment_type == DeploymentType.SERVERLESS:
-            metrics = self._collect_serverless_deployment_metrics(deployment)
+            collector = self._collect_hibernated_deployment_metrics
         else:
-            raise ValueError(f"Unsupported deployment type: {deployment.deployment_type}")
+            collector = self._collectors.get(deployment.deployment_type)
+            if collector is None:
+                raise ValueError(f"Unsupported deployment type: {deployment.deployment_type}")
+        
+        metrics = collector(deployment)
         
         # Add common metrics
         metrics.update({
             "deployment_id": deployment.id,
             "deployment_name": deployment.name,
             "deployment_type": deployment.deployment_type.value,
-            "deployment_status": deployment.status.value,
+            "deployment_status": status.value,
             "model_id": deployment.model_id,
             "model_type": deployment.model_type,
-            "timestamp": datetime.datetime.utcnow().isoformat(),
+            "timestamp": timestamp,
         })
         
         # Save metrics
-        self._save_deployment_metrics(deployment_id, metrics)
+        self._save_deployment_metrics(deployment.id, metrics)
         
         return metrics
     
@@ -135,40 +242,14 @@ class MonitoringService:
         Returns:
             List of metrics
         """
-        logger.info(f"Getting metrics for deployment {deployment_id}")
+        logger.info("Getting metrics for deployment %s", deployment_id)
         
         # Get deployment
         deployment = self.deployment_service.get_deployment(deployment_id)
         if not deployment:
             raise ValueError(f"Deployment {deployment_id} not found")
         
-        # Load metrics tracking data
-        metrics_data = self._load_metrics_tracking()
-        
-        # Get metrics for deployment
-        if deployment_id not in metrics_data:
-            return []
-        
-        deployment_metrics = metrics_data[deployment_id]
-        
-        # Filter by time range if specified
-        if start_time or end_time:
-            start_datetime = (
-                datetime.datetime.fromisoformat(start_time) if start_time else datetime.datetime.min
-            )
-            end_datetime = (
-                datetime.datetime.fromisoformat(end_time) if end_time else datetime.datetime.max
-            )
-            
-            filtered_metrics = []
-            for metrics in deployment_metrics:
-                metrics_time = datetime.datetime.fromisoformat(metrics["timestamp"])
-                if start_datetime <= metrics_time <= end_datetime:
-                    filtered_metrics.append(metrics)
-            
-            return filtered_metrics
-        else:
-            return deployment_metrics
+        return list(self._iter_deployment_metrics(deployment_id, start_time, end_time))
     
     def get_cost_metrics(
         self, start_time: Optional[str] = None, end_time: Optional[str] = None
@@ -184,41 +265,12 @@ class MonitoringService:
         """
         logger.info("Getting cost metrics for all deployments")
         
-        # Get all deployments
-        deployments = self.deployment_service.list_deployments()
-        
-        # Get cost metrics for each deployment
-        results = {}
-        for deployment in deployments:
-            try:
-                metrics = self.get_deployment_metrics(deployment.id, start_time, end_time)
-                
-                # Calculate cost metrics
-                total_cost = 0
-                cost_breakdown = {
-                    "compute": 0,
-                    "storage": 0,
-                    "network": 0,
-                }
-                
-                for metric in metrics:
-                    if "cost" in metric:
-                        total_cost += metric["cost"].get("total", 0)
-                        cost_breakdown["compute"] += metric["cost"].get("compute", 0)
-                        cost_breakdown["storage"] += metric["cost"].get("storage", 0)
-                        cost_breakdown["network"] += metric["cost"].get("network", 0)
-                
-                results[deployment.id] = {
-                    "deployment_id": deployment.id,
-                    "deployment_name": deployment.name,
-                    "total_cost": total_cost,
-                    "cost_breakdown": cost_breakdown,
-                }
-            except Exception as e:
-                logger.error(f"Error getting cost metrics for deployment {deployment.id}: {e}")
-                results[deployment.id] = {"error": str(e)}
-        
-        return results
+        return {
+            deployment_id: summary.get("cost", summary)
+            for deployment_id, summary in self._summarize_metrics(
+                start_time, end_time, cost=True, performance=False
+            ).items()
+        }
     
     def get_performance_metrics(
         self, start_time: Optional[str] = None, end_time: Optional[str] = None
@@ -234,41 +286,28 @@ class MonitoringService:
         """
         logger.info("Getting performance metrics for all deployments")
         
-        # Get all deployments
-        deployments = self.deployment_service.list_deployments()
+        return {
+            deployment_id: summary.get("performance", summary)
+            for deployment_id, summary in self._summarize_metrics(
+                start_time, end_time, cost=False, performance=True
+            ).items()
+        }
+    
+    def get_combined_metrics(
+        self, start_time: Optional[str] = None, end_time: Optional[str] = None
+    ) -> Dict[str, Dict]:
+        """Get cost and performance metrics for all deployments in one pass.
         
-        # Get performance metrics for each deployment
-        results = {}
-        for deployment in deployments:
-            try:
-                metrics = self.get_deployment_metrics(deployment.id, start_time, end_time)
-                
-                # Calculate performance metrics
-                total_requests = 0
-                total_latency = 0
-                total_errors = 0
-                
-                for metric in metrics:
-                    if "requests" in metric:
-                        total_requests += metric["requests"].get("count", 0)
-                        total_latency += metric["requests"].get("total_latency", 0)
-                        total_errors += metric["requests"].get("errors", 0)
-                
-                avg_latency = total_latency / total_requests if total_requests > 0 else 0
-                error_rate = (total_errors / total_requests) * 100 if total_requests > 0 else 0
-                
-                results[deployment.id] = {
-                    "deployment_id": deployment.id,
-                    "deployment_name": deployment.name,
-                    "total_requests": total_requests,
-                    "avg_latency": avg_latency,
-                    "error_rate": error_rate,
-                }
-            except Exception as e:
-                logger.error(f"Error getting performance metrics for deployment {deployment.id}: {e}")
-                results[deployment.id] = {"error": str(e)}
+        Args:
+            start_time: Start time for metrics query (ISO format)
+            end_time: End time for metrics query (ISO format)
+            
+        Returns:
+            Dictionary mapping deployment IDs to {"cost": ..., "performance": ...}
+        """
+        logger.info("Getting cost and performance metrics for all deployments")
         
-        return results
+        return self._summarize_metrics(start_time, end_time, cost=True, performance=True)
     
     def detect_anomalies(self) -> Dict[str, List[Dict]]:
         """Detect anomalies in deployment metrics.
@@ -296,57 +335,273 @@ class MonitoringService:
                 if anomalies:
                     results[deployment.id] = anomalies
             except Exception as e:
-                logger.error(f"Error detecting anomalies for deployment {deployment.id}: {e}")
+                logger.exception("Error detecting anomalies for deployment %s", deployment.id)
                 results[deployment.id] = [{"type": "error", "message": str(e)}]
         
         return results
     
     def _init_metrics_tracking(self) -> None:
-        """Initialize metrics tracking data."""
-        if not os.path.exists(self.metrics_tracking_path):
-            self._save_metrics_tracking({})
+        """Initialize metrics tracking data.
+        
+        Samples from the older single-file format are moved into the
+        per-deployment files the first time the service starts.
+        """
+        os.makedirs(self.deployment_metrics_path, exist_ok=True)
+        
+        if os.path.exists(self.metrics_tracking_path):
+            with open(self.metrics_tracking_path, "rb") as f:
+                metrics_data = self._decode_metrics(f.read())
+            
+            for deployment_id, deployment_metrics in metrics_data.items():
+                with open(self._deployment_metrics_file(deployment_id), "ab") as f:
+                    for metrics in deployment_metrics[-MAX_METRICS_PER_DEPLOYMENT:]:
+                        f.write(self._encode_metrics(metrics))
+            
+            os.rename(self.metrics_tracking_path, f"{self.metrics_tracking_path}.migrated")
     
-    def _load_metrics_tracking(self) -> Dict:
-        """Load metrics tracking data.
+    def _deployment_metrics_file(self, deployment_id: str) -> str:
+        """Get the path of a deployment's metrics file.
         
+        Args:
+            deployment_id: ID of the deployment
+            
         Returns:
-            Metrics tracking data
+            Path to the deployment's JSON Lines metrics file
         """
-        with open(self.metrics_tracking_path, "r") as f:
-            return json.load(f)
+        return os.path.join(self.deployment_metrics_path, f"{deployment_id}.jsonl")
     
-    def _save_metrics_tracking(self, metrics_data: Dict) -> None:
-        """Save metrics tracking data.
+    def _encode_metrics(self, metrics: Dict) -> bytes:
+        """Encode a metrics sample as one JSON Lines row."""
+        if orjson is not None:
+            return orjson.dumps(metrics, option=orjson.OPT_APPEND_NEWLINE)
+        return (json.dumps(metrics) + "\n").encode()
+    
+    def _decode_metrics(self, line: bytes) -> Dict:
+        """Decode one JSON Lines row into a metrics sample."""
+        if orjson is not None:
+            return orjson.loads(line)
+        return json.loads(line)
+    
+    def _iter_deployment_metrics(
+        self, deployment_id: str, start_time: Optional[str] = None, end_time: Optional[str] = None
+    ) -> Iterator[Dict]:
+        """Stream a deployment's stored metrics within a time range.
         
         Args:
-            metrics_data: Metrics tracking data
+            deployment_id: ID of the deployment
+            start_time: Start time for metrics query (ISO format)
+            end_time: End time for metrics query (ISO format)
+            
+        Returns:
+            Iterator over metrics samples, oldest first
         """
-        with open(self.metrics_tracking_path, "w") as f:
-            json.dump(metrics_data, f, indent=2)
+        # Normalize the time range so it compares as strings against the
+        # isoformat() timestamps stored with each sample
+        start = datetime.datetime.fromisoformat(start_time).isoformat() if start_time else None
+        end = datetime.datetime.fromisoformat(end_time).isoformat() if end_time else None
+        
+        metrics_file = self._deployment_metrics_file(deployment_id)
+        if not os.path.exists(metrics_file):
+            return
+        
+        # Samples are appended in time order, so the range is a contiguous
+        # run of rows that can be located without decoding the others. The
+        # file is opened under the lock, so the rows read match the index even
+        # if the file is compacted (replaced) while they are streamed.
+        with self._metrics_lock(deployment_id):
+            timestamps, offsets = self._get_metrics_index(deployment_id)
+            first = bisect.bisect_left(timestamps, start) if start else 0
+            last = bisect.bisect_right(timestamps, end) if end else len(timestamps)
+            if first >= last:
+                return
+            f = open(metrics_file, "rb")
+        
+        with f:
+            f.seek(offsets[first])
+            for _ in range(last - first):
+                yield self._decode_metrics(f.readline())
     
-    def _save_deployment_metrics(self, deployment_id: str, metrics: Dict) -> None:
-        """Save metrics for a deployment.
+    def _load_metric_columns(
+        self, deployment_id: str, start_time: Optional[str], end_time: Optional[str]
+    ) -> Dict[str, np.ndarray]:
+        """Load a deployment's cost and request figures within a time range as columns.
         
         Args:
             deployment_id: ID of the deployment
-            metrics: Metrics to save
+            start_time: Start time for metrics query (ISO format)
+            end_time: End time for metrics query (ISO format)
+            
+        Returns:
+            Dictionary mapping METRIC_COLUMNS names to one value per sample
         """
-        # Load metrics tracking data
-        metrics_data = self._load_metrics_tracking()
+        rows = np.array(
+            [_metric_row(metrics) for metrics in self._iter_deployment_metrics(deployment_id, start_time, end_time)],
+            dtype=np.float64,
+        ).reshape(-1, len(METRIC_COLUMNS))
+        return dict(zip(METRIC_COLUMNS, rows.T))
+    
+    def _summarize_metrics(
+        self, start_time: Optional[str], end_time: Optional[str], cost: bool, performance: bool
+    ) -> Dict[str, Dict]:
+        """Summarize cost and/or performance metrics for all deployments.
         
-        # Initialize deployment metrics if not exists
-        if deployment_id not in metrics_data:
-            metrics_data[deployment_id] = []
+        Each deployment's metrics are read once, whichever summaries are
+        requested.
         
-        # Add metrics
-        metrics_data[deployment_id].append(metrics)
+        Args:
+            start_time: Start time for metrics query (ISO format)
+            end_time: End time for metrics query (ISO format)
+            cost: Whether to include cost metrics
+            performance: Whether to include performance metrics
+            
+        Returns:
+            Dictionary mapping deployment IDs to the requested summaries
+        """
+        # Get all deployments
+        deployments = self.deployment_service.list_deployments()
         
-        # Limit to last 1000 metrics per deployment
-        if len(metrics_data[deployment_id]) > 1000:
-            metrics_data[deployment_id] = metrics_data[deployment_id][-1000:]
+        results = {}
+        for deployment in deployments:
+            try:
+                columns = self._load_metric_columns(deployment.id, start_time, end_time)
+                totals = {name: float(column.sum()) for name, column in columns.items()}
+                
+                summary = {}
+                if cost:
+                    summary["cost"] = {
+                        "deployment_id": deployment.id,
+                        "deployment_name": deployment.name,
+                        "total_cost": totals["total_cost"],
+                        "cost_breakdown": {
+                            "compute": totals["compute"],
+                            "storage": totals["storage"],
+                            "network": totals["network"],
+                        },
+                    }
+                if performance:
+                    total_requests = int(totals["requests"])
+                    summary["performance"] = {
+                        "deployment_id": deployment.id,
+                        "deployment_name": deployment.name,
+                        "total_requests": total_requests,
+                        "avg_latency": totals["latency"] / total_requests if total_requests > 0 else 0,
+                        "error_rate": (totals["errors"] / total_requests) * 100 if total_requests > 0 else 0,
+                    }
+                results[deployment.id] = summary
+            except Exception as e:
+                logger.exception("Error getting metrics for deployment %s", deployment.id)
+                results[deployment.id] = {"error": str(e)}
         
-        # Save metrics tracking data
-        self._save_metrics_tracking(metrics_data)
+        return results
+    
+    def _metrics_lock(self, deployment_id: str) -> threading.Lock:
+        """Get the lock guarding a deployment's metrics file and index.
+        
+        Args:
+            deployment_id: ID of the deployment
+            
+        Returns:
+            Lock for the deployment's metrics
+        """
+        with self._metrics_locks_lock:
+            lock = self._metrics_locks.get(deployment_id)
+            if lock is None:
+                lock = self._metrics_locks[deployment_id] = threading.Lock()
+            return lock
+    
+    def _get_metrics_index(self, deployment_id: str) -> Tuple[List[str], List[int]]:
+        """Get the timestamp index of a deployment's metrics file.
+        
+        The index is built with one scan of the file and kept up to date as
+        samples are appended. It is reused for as long as the file is the
+        size this service last left it at, and rebuilt if another process
+        has written to the file since. Callers must hold the deployment's
+        metrics lock.
+        
+        Args:
+            deployment_id: ID of the deployment
+            
+        Returns:
+            Sample timestamps and the file offset of each sample's row
+        """
+        metrics_file = self._deployment_metrics_file(deployment_id)
+        try:
+            size = os.stat(metrics_file).st_size
+        except FileNotFoundError:
+            size = 0
+        
+        index = self._metrics_index.get(deployment_id)
+        if index is None or self._metrics_file_sizes.get(deployment_id) != size:
+            timestamps, offsets = [], []
+            offset = 0
+            if size:
+                with open(metrics_file, "rb") as f:
+                    for line in f:
+                        timestamps.append(self._decode_metrics(line)["timestamp"])
+                        offsets.append(offset)
+                        offset += len(line)
+            
+            index = self._metrics_index[deployment_id] = (timestamps, offsets)
+            self._metrics_file_sizes[deployment_id] = offset
+        return index
+    
+    def _save_deployment_metrics(self, deployment_id: str, metrics: Dict) -> None:
+        """Save metrics for a deployment.
+        
+        Args:
+            deployment_id: ID of the deployment
+            metrics: Metrics to save
+        """
+        with self._metrics_lock(deployment_id):
+            metrics_file = self._deployment_metrics_file(deployment_id)
+            timestamps, offsets = self._get_metrics_index(deployment_id)
+            
+            # Append metrics
+            row = self._encode_metrics(metrics)
+            with open(metrics_file, "ab", buffering=1 << 16) as f:
+                offset = f.tell()
+                f.write(row)
+            timestamps.append(metrics["timestamp"])
+            offsets.append(offset)
+            self._metrics_file_sizes[deployment_id] = offset + len(row)
+            
+            # Limit to last 1000 metrics per deployment
+            if len(timestamps) > METRICS_COMPACT_THRESHOLD:
+                with open(metrics_file, "rb") as f:
+                    recent_metrics = deque(f, maxlen=MAX_METRICS_PER_DEPLOYMENT)
+                
+                compacted_file = f"{metrics_file}.tmp"
+                with open(compacted_file, "wb") as f:
+                    f.writelines(recent_metrics)
+                os.replace(compacted_file, metrics_file)
+                
+                # Rebase the index onto the compacted file
+                dropped = len(timestamps) - len(recent_metrics)
+                base = offsets[dropped]
+                del timestamps[:dropped]
+                offsets[:] = [offset - base for offset in offsets[dropped:]]
+                self._metrics_file_sizes[deployment_id] -= base
+    
+    def _next_simulated_reading(self) -> SimulatedReading:
+        """Take the next simulated reading, drawing a new batch when they run out.
+        
+        Returns:
+            Simulated readings for one deployment
+        """
+        with self._simulation_lock:
+            if not self._simulated_readings:
+                rng = self._rng
+                self._simulated_readings = [
+                    SimulatedReading(*reading)
+                    for reading in zip(
+                        rng.uniform(10, 90, SIMULATION_BATCH_SIZE).tolist(),
+                        rng.uniform(10, 90, SIMULATION_BATCH_SIZE).tolist(),
+                        rng.integers(10, 1000, SIMULATION_BATCH_SIZE, endpoint=True).tolist(),
+                        rng.uniform(10, 500, SIMULATION_BATCH_SIZE).tolist(),
+                        rng.uniform(0, 0.05, SIMULATION_BATCH_SIZE).tolist(),
+                    )
+                ]
+            return self._simulated_readings.pop()
     
     def _collect_hibernated_deployment_metrics(self, deployment: Deployment) -> Dict:
         """Collect metrics for a hibernated deployment.
@@ -386,18 +641,20 @@ class MonitoringService:
         # In a real implementation, this would query Kubernetes metrics API
         # For this implementation, we'll generate simulated metrics
         
+        reading = self._next_simulated_reading()
+        
         # Generate resource utilization metrics
-        cpu_utilization = random.uniform(10, 90)
-        memory_utilization = random.uniform(10, 90)
+        cpu_utilization = reading.cpu_utilization
+        memory_utilization = reading.memory_utilization
         
         # Generate request metrics
-        request_count = random.randint(10, 1000)
-        avg_latency = random.uniform(10, 500)  # ms
-        error_count = int(request_count * random.uniform(0, 0.05))  # 0-5% error rate
+        request_count = reading.request_count
+        avg_latency = reading.avg_latency  # ms
+        error_count = int(request_count * reading.error_rate)  # 0-5% error rate
         
         # Calculate costs
-        cpu_cost = float(deployment.resource_requirements.cpu) * 0.04  # $0.04 per CPU per hour
-        memory_cost = float(deployment.resource_requirements.memory.rstrip("Gi")) * 0.01  # $0.01 per GB per hour
+        cpu_cost = deployment.resource_requirements.cpu_cores * 0.04  # $0.04 per CPU per hour
+        memory_cost = deployment.resource_requirements.memory_gib * 0.01  # $0.01 per GB per hour
         gpu_cost = 0
         if deployment.resource_requirements.gpu:
             gpu_cost = float(deployment.resource_requirements.gpu) * 0.5  # $0.5 per GPU per hour
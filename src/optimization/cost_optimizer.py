@@ -7,16 +7,108 @@ import datetime
 import json
 import logging
 import os
+import threading
 import time
-from typing import Dict, List, Optional, Tuple
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
 
 from core.deployment import DeploymentService
-from core.models import Deployment, DeploymentStatus, DeploymentType
+from core.models import Deployment, DeploymentStatus, DeploymentType, SpotAllocationStrategy
 from infrastructure.kubernetes import KubernetesDeployer
 from infrastructure.serverless import ServerlessDeployer
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# Pricing and utilization lookups are memoized per process. Entries hold
+# (expiry, value) and the caches are bounded, evicting the oldest entry first.
+PRICING_CACHE_TTL = 300.0
+UTILIZATION_CACHE_TTL = 60.0
+LOOKUP_CACHE_SIZE = 1024
+
+# Spot capacity ranking. An interruption costs roughly this many times the
+# hourly spot price in rescheduling and redeployment, and capacity-optimized
+# allocation only accepts pools below the maximum interruption rate.
+SPOT_INTERRUPTION_COST_FACTOR = 2.0
+MAX_SPOT_INTERRUPTION_RATE = 0.1
+
+# Expected savings percentage and relative lookup cost of each optimization
+# strategy. Strategies run in order of savings per unit of cost, and a
+# terminal outcome skips the strategies after it.
+STRATEGY_PRIORITIES = {
+    "hibernation": (30, 1),
+    "resource_sizing": (15, 2),
+    "spot_instances": (50, 3),
+    "multi_cloud_arbitrage": (10, 10),
+}
+STRATEGY_ORDER = sorted(
+    STRATEGY_PRIORITIES,
+    key=lambda name: STRATEGY_PRIORITIES[name][0] / STRATEGY_PRIORITIES[name][1],
+    reverse=True,
+)
+TERMINAL_STRATEGY_STATUSES = {"hibernated", "migrated"}
+
+# One-off cost of moving a deployment to another cloud, used to spend the
+# fleet-wide migration budget on the migrations that save the most per dollar
+MIGRATION_FIXED_COST = 5.0  # $5 to rebuild and redeploy
+MIGRATION_COST_PER_GIB = 0.09  # $0.09 per GiB of egress
+HOURS_PER_MONTH = 730
+
+
+def _json_default(value):
+    """Encode the NumPy values and datetimes that stdlib json cannot."""
+    if isinstance(value, datetime.datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=datetime.timezone.utc)
+        return value.isoformat()
+    if isinstance(value, (np.generic, np.ndarray)):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class MigrationBudget:
+    """Migration budget shared by the deployments of one optimization run."""
+    
+    def __init__(self, amount: float):
+        """Initialize the migration budget.
+        
+        Args:
+            amount: Total migration cost in USD that may be spent
+        """
+        self.remaining = amount
+        self._lock = threading.Lock()
+    
+    def reserve(self, cost: float) -> bool:
+        """Reserve part of the budget for a migration.
+        
+        Args:
+            cost: Estimated migration cost in USD
+            
+        Returns:
+            Whether the cost fits in the remaining budget
+        """
+        with self._lock:
+            if cost > self.remaining:
+                return False
+            self.remaining -= cost
+            return True
+    
+    def release(self, cost: float) -> None:
+        """Return a reservation for a migration that did not happen.
+        
+        Args:
+            cost: Reserved migration cost in USD
+        """
+        with self._lock:
+            self.remaining += cost
+
 
 class CostOptimizer:
     """Service for optimizing deployment costs."""
@@ -27,6 +119,8 @@ class CostOptimizer:
         kubernetes_deployer: KubernetesDeployer,
         serverless_deployer: ServerlessDeployer,
         cost_data_path: str = "/tmp/ai-deploy-platform/cost_data",
+        max_workers: Optional[int] = None,
+        migration_budget: Optional[float] = None,
     ):
         """Initialize the cost optimizer.
         
@@ -35,11 +129,22 @@ class CostOptimizer:
             kubernetes_deployer: Deployer for Kubernetes deployments
             serverless_deployer: Deployer for serverless deployments
             cost_data_path: Path to store cost data
+            max_workers: Maximum number of deployments to optimize at once
+                (defaults to ThreadPoolExecutor's default)
+            migration_budget: Maximum total migration cost in USD per
+                optimize_all_deployments run (unlimited by default)
         """
         self.deployment_service = deployment_service
         self.kubernetes_deployer = kubernetes_deployer
         self.serverless_deployer = serverless_deployer
         self.cost_data_path = cost_data_path
+        self.max_workers = max_workers
+        self.migration_budget = migration_budget
+        
+        self._pricing_cache: "OrderedDict[Tuple, Tuple[float, object]]" = OrderedDict()
+        self._utilization_cache: "OrderedDict[Tuple, Tuple[float, object]]" = OrderedDict()
+        self._last_active_cache: Dict[str, float] = {}
+        self._lookup_cache_lock = threading.Lock()
         
         # Create cost data directory if it doesn't exist
         os.makedirs(cost_data_path, exist_ok=True)
@@ -52,88 +157,402 @@ class CostOptimizer:
         """
         logger.info("Optimizing all deployments for cost")
         
-        # Get all deployments
-        deployments = self.deployment_service.list_deployments()
+        # Get the deployments that can be optimized
+        deployments = self.deployment_service.list_deployments(status=DeploymentStatus.ACTIVE)
         
-        # Optimize each deployment
+        # Record the whole run in a single JSON Lines file instead of saving
+        # each deployment's results separately
+        now_ts = time.time()
+        run_time = datetime.datetime.utcfromtimestamp(now_ts)
+        run_log_path = os.path.join(self.cost_data_path, f"run-{run_time.strftime('%Y%m%dT%H%M%S%f')}.ndjson")
+        timestamp = run_time.isoformat()
+        
+        # Optimize deployments concurrently, since each optimization mostly
+        # waits on the deployment service and pricing lookups
         results = {}
-        for deployment in deployments:
-            try:
-                result = self.optimize_deployment(deployment.id)
-                results[deployment.id] = result
-            except Exception as e:
-                logger.error(f"Error optimizing deployment {deployment.id}: {e}")
-                results[deployment.id] = {"error": str(e)}
+        with open(run_log_path, "ab") as run_log, ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="cost-optimizer"
+        ) as executor:
+            # Fetch pricing once per distinct provider/region/resource spec rather
+            # than once per deployment, with the lookups running concurrently
+            pricing_cache = self._batch_fetch_pricing(deployments, executor)
+            
+            # Share the migration budget across the whole fleet. Migrations
+            # reserve it as their checks run, so deployments hibernated first
+            # don't use any, and the deployments whose migrations save the most
+            # per dollar are optimized first.
+            migration_budget = None
+            if self.migration_budget is not None:
+                migration_budget = MigrationBudget(self.migration_budget)
+                deployments = self._rank_migration_candidates(deployments, pricing_cache)
+            
+            # Fetch utilization concurrently, then size every deployment in one
+            # vectorized pass
+            sizing_plan = self._plan_fleet_resource_sizing(deployments, executor)
+            
+            futures = {
+                deployment.id: executor.submit(
+                    self.optimize_deployment,
+                    deployment.id,
+                    pricing_cache=pricing_cache,
+                    save_results=False,
+                    deployment=deployment,
+                    sizing_plan=sizing_plan,
+                    now_ts=now_ts,
+                    migration_budget=migration_budget,
+                )
+                for deployment in deployments
+            }
+            
+            # Results are gathered and written from this thread only
+            for deployment_id, future in futures.items():
+                try:
+                    results[deployment_id] = future.result()
+                except Exception as e:
+                    logger.error("Error optimizing deployment %s: %s", deployment_id, e)
+                    results[deployment_id] = {"error": str(e)}
+                
+                run_log.write(self._encode_run_log_entry(deployment_id, timestamp, results[deployment_id]))
+        
+        logger.info("Saved cost optimization results for %d deployments to %s", len(results), run_log_path)
         
         return results
     
-    def optimize_deployment(self, deployment_id: str) -> Dict:
+    def _encode_run_log_entry(self, deployment_id: str, timestamp: str, results: Dict) -> bytes:
+        """Encode one deployment's optimization results as a JSON Lines row.
+        
+        Results may hold NumPy values from the sizing plan and naive UTC
+        datetimes, which are encoded without a custom encoder under orjson.
+        """
+        entry = {"deployment_id": deployment_id, "timestamp": timestamp, "results": results}
+        if orjson is not None:
+            return orjson.dumps(
+                entry,
+                option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NAIVE_UTC,
+            )
+        return (json.dumps(entry, default=_json_default) + "\n").encode()
+    
+    def optimize_deployment(
+        self,
+        deployment_id: str,
+        pricing_cache: Optional[Dict[str, Dict]] = None,
+        save_results: bool = True,
+        deployment: Optional[Deployment] = None,
+        sizing_plan: Optional[Dict[str, Dict]] = None,
+        now_ts: Optional[float] = None,
+        migration_budget: Optional[MigrationBudget] = None,
+    ) -> Dict:
         """Optimize a deployment for cost.
         
         Args:
             deployment_id: ID of the deployment to optimize
+            pricing_cache: Pre-fetched pricing from _batch_fetch_pricing; pricing
+                missing from it is fetched for this deployment alone
+            save_results: Whether to save the results, or leave that to the caller
+            deployment: The deployment, if the caller has already loaded it
+            sizing_plan: Pre-computed sizing from _plan_resource_sizing
+            now_ts: Current UNIX timestamp, shared by a batch of optimizations
+            migration_budget: Migration budget shared by a batch of
+                optimizations (unlimited if not given)
             
         Returns:
             Optimization results
         """
-        logger.info(f"Optimizing deployment {deployment_id} for cost")
+        logger.info("Optimizing deployment %s for cost", deployment_id)
         
         # Get deployment
-        deployment = self.deployment_service.get_deployment(deployment_id)
+        if deployment is None:
+            deployment = self.deployment_service.get_deployment(deployment_id)
         if not deployment:
             raise ValueError(f"Deployment {deployment_id} not found")
         
         # Skip deployments that are not active
         if deployment.status != DeploymentStatus.ACTIVE:
-            logger.info(f"Skipping optimization for non-active deployment {deployment_id}")
+            logger.info("Skipping optimization for non-active deployment %s", deployment_id)
             return {"status": "skipped", "reason": f"Deployment is {deployment.status.value}"}
         
         # Apply cost optimization strategies
-        results = {}
-        
-        # Check for hibernation opportunity
-        hibernation_result = self._check_hibernation(deployment)
-        results["hibernation"] = hibernation_result
-        
-        # Check for spot/preemptible instance opportunity
-        spot_result = self._check_spot_instances(deployment)
-        results["spot_instances"] = spot_result
-        
-        # Check for resource right-sizing opportunity
-        sizing_result = self._check_resource_sizing(deployment)
-        results["resource_sizing"] = sizing_result
+        now_ts = time.time() if now_ts is None else now_ts
+        strategies = {
+            # Check for hibernation opportunity
+            "hibernation": lambda: self._check_hibernation(deployment, now_ts),
+            # Check for spot/preemptible instance opportunity
+            "spot_instances": lambda: self._check_spot_instances(deployment, pricing_cache),
+            # Check for resource right-sizing opportunity
+            "resource_sizing": lambda: self._check_resource_sizing(deployment, sizing_plan),
+        }
         
         # Check for multi-cloud arbitrage opportunity
         if deployment.cost_optimization_policy.multi_cloud_enabled:
-            arbitrage_result = self._check_multi_cloud_arbitrage(deployment)
-            results["multi_cloud_arbitrage"] = arbitrage_result
+            strategies["multi_cloud_arbitrage"] = lambda: self._check_multi_cloud_arbitrage(
+                deployment, pricing_cache, migration_budget
+            )
+        
+        results = {}
+        terminal_status = None
+        for name in STRATEGY_ORDER:
+            if name not in strategies:
+                continue
+            
+            # Once a deployment is hibernated or migrated, the remaining
+            # checks would act on a deployment that is no longer running
+            if terminal_status:
+                results[name] = {"status": "skipped", "reason": f"Deployment was {terminal_status}"}
+                continue
+            
+            results[name] = strategies[name]()
+            if results[name].get("status") in TERMINAL_STRATEGY_STATUSES:
+                terminal_status = results[name]["status"]
         
         # Save optimization results
-        self._save_optimization_results(deployment_id, results)
+        if save_results:
+            self._save_optimization_results(deployment_id, results)
         
-        logger.info(f"Completed cost optimization for deployment {deployment_id}")
+        logger.info("Completed cost optimization for deployment %s", deployment_id)
         
         return results
     
-    def _check_hibernation(self, deployment: Deployment) -> Dict:
+    def _pricing_key(self, deployment: Deployment) -> Tuple:
+        """Get the key that a deployment's pricing depends on.
+        
+        Args:
+            deployment: Deployment to get the pricing key for
+            
+        Returns:
+            Tuple of cloud provider, region, CPU, memory and GPU
+        """
+        metadata = deployment.metadata
+        requirements = deployment.resource_requirements
+        return (
+            metadata.get("cloud_provider", "aws"),
+            metadata.get("cloud_region", "us-east-1"),
+            requirements.cpu,
+            requirements.memory,
+            requirements.gpu,
+        )
+    
+    def _cached_lookup(self, cache: OrderedDict, key: Tuple, ttl: float, fetch: Callable[[], object]) -> object:
+        """Return a memoized lookup result, calling fetch if it is missing or expired.
+        
+        Args:
+            cache: Cache to look the key up in
+            key: Cache key
+            ttl: Seconds a fetched result stays fresh
+            fetch: Function performing the lookup
+            
+        Returns:
+            Lookup result
+        """
+        now = time.monotonic()
+        with self._lookup_cache_lock:
+            entry = cache.get(key)
+            if entry is not None and entry[0] > now:
+                return entry[1]
+        
+        # Fetch outside the lock so slow lookups do not serialize each other
+        value = fetch()
+        
+        with self._lookup_cache_lock:
+            cache[key] = (time.monotonic() + ttl, value)
+            cache.move_to_end(key)
+            if len(cache) > LOOKUP_CACHE_SIZE:
+                cache.popitem(last=False)
+        
+        return value
+    
+    def _get_spot_pricing(self, deployment: Deployment) -> Tuple[bool, float, float]:
+        """Get spot instance availability and pricing, memoized by pricing key.
+        
+        Args:
+            deployment: Deployment to get pricing for
+            
+        Returns:
+            Tuple of spot availability, spot price and on-demand price
+        """
+        return self._cached_lookup(
+            self._pricing_cache,
+            ("spot",) + self._pricing_key(deployment),
+            PRICING_CACHE_TTL,
+            lambda: self._check_spot_pricing(deployment),
+        )
+    
+    def _get_cached_multi_cloud_pricing(self, deployment: Deployment) -> Dict:
+        """Get multi-cloud pricing, memoized by pricing key.
+        
+        Args:
+            deployment: Deployment to get pricing for
+            
+        Returns:
+            Dictionary mapping cloud providers to price and region
+        """
+        key = self._pricing_key(deployment)
+        provider, region = key[0], key[1]
+        return self._cached_lookup(
+            self._pricing_cache,
+            ("multi_cloud",) + key,
+            PRICING_CACHE_TTL,
+            lambda: self._get_multi_cloud_pricing(deployment, provider, region),
+        )
+    
+    def _get_cached_resource_utilization(self, deployment: Deployment) -> Tuple[float, float]:
+        """Get CPU and memory utilization, memoized per deployment and size.
+        
+        The current CPU and memory are part of the key, so resizing a
+        deployment does not reuse utilization measured at the old size.
+        
+        Args:
+            deployment: Deployment to get utilization for
+            
+        Returns:
+            Tuple of CPU and memory utilization percentages
+        """
+        requirements = deployment.resource_requirements
+        key = (deployment.id, requirements.cpu, requirements.memory)
+        return self._cached_lookup(
+            self._utilization_cache,
+            key,
+            UTILIZATION_CACHE_TTL,
+            lambda: self._get_resource_utilization(deployment),
+        )
+    
+    def _batch_fetch_pricing(self, deployments: List[Deployment], executor: ThreadPoolExecutor) -> Dict[str, Dict]:
+        """Fetch pricing for a set of deployments, once per distinct pricing key.
+        
+        Only deployments that the spot instance and multi-cloud checks would
+        actually price are considered. A lookup that fails is left out, so the
+        check for that deployment retries it and reports the error.
+        
+        Args:
+            deployments: Deployments to fetch pricing for
+            executor: Executor to run the lookups on concurrently
+            
+        Returns:
+            Dictionary with "spot" and "multi_cloud" maps from pricing key to
+            the spot pricing tuple and the multi-cloud pricing data respectively
+        """
+        # Pick one deployment to price for each distinct key
+        lookups = {"spot": {}, "multi_cloud": {}}
+        for deployment in deployments:
+            if deployment.status != DeploymentStatus.ACTIVE:
+                continue
+            
+            policy = deployment.cost_optimization_policy
+            key = self._pricing_key(deployment)
+            
+            if (
+                policy.use_spot_instances
+                and deployment.deployment_type != DeploymentType.SERVERLESS
+                and not deployment.metadata.get("using_spot_instances", False)
+            ):
+                lookups["spot"].setdefault(key, deployment)
+            
+            if policy.multi_cloud_enabled:
+                lookups["multi_cloud"].setdefault(key, deployment)
+        
+        fetchers = {"spot": self._get_spot_pricing, "multi_cloud": self._get_cached_multi_cloud_pricing}
+        futures = {
+            (kind, key): executor.submit(fetchers[kind], deployment)
+            for kind, representatives in lookups.items()
+            for key, deployment in representatives.items()
+        }
+        
+        pricing_cache = {"spot": {}, "multi_cloud": {}}
+        for (kind, key), future in futures.items():
+            try:
+                pricing_cache[kind][key] = future.result()
+            except Exception as e:
+                logger.warning("Error pre-fetching %s pricing for %s: %s", kind, key, e)
+        
+        logger.debug(
+            "Pre-fetched pricing for %d deployments: %d spot, %d multi-cloud lookups",
+            len(deployments),
+            len(pricing_cache["spot"]),
+            len(pricing_cache["multi_cloud"]),
+        )
+        
+        return pricing_cache
+    
+    def _rank_migration_candidates(
+        self, deployments: List[Deployment], pricing_cache: Dict[str, Dict]
+    ) -> List[Deployment]:
+        """Order deployments so beneficial migrations come first, best value first.
+        
+        Migrations are ranked by monthly savings per dollar of migration cost,
+        so they claim the shared migration budget in that order. Deployments
+        that cannot be ranked keep their order after the ranked ones.
+        
+        Args:
+            deployments: Deployments being optimized
+            pricing_cache: Pre-fetched pricing from _batch_fetch_pricing
+            
+        Returns:
+            The deployments, reordered
+        """
+        ranks = {}
+        for deployment in deployments:
+            if not deployment.cost_optimization_policy.multi_cloud_enabled:
+                continue
+            
+            pricing_data = pricing_cache["multi_cloud"].get(self._pricing_key(deployment))
+            if pricing_data is None:
+                continue
+            
+            try:
+                current_provider = deployment.metadata.get("cloud_provider", "aws")
+                cheapest_provider, cheapest_info = min(pricing_data.items(), key=lambda item: item[1]["price"])
+                current_price = pricing_data[current_provider]["price"]
+                if cheapest_provider == current_provider or cheapest_info["price"] >= current_price * 0.9:
+                    continue
+                
+                monthly_savings = (current_price - cheapest_info["price"]) * HOURS_PER_MONTH
+                ranks[deployment.id] = monthly_savings / self._estimate_migration_cost(deployment)
+            except Exception as e:
+                logger.warning("Error ranking migration for deployment %s: %s", deployment.id, e)
+        
+        return sorted(deployments, key=lambda d: -ranks.get(d.id, float("-inf")))
+    
+    def _estimate_migration_cost(self, deployment: Deployment) -> float:
+        """Estimate the one-off cost of migrating a deployment to another cloud.
+        
+        Args:
+            deployment: Deployment to estimate the migration cost for
+            
+        Returns:
+            Estimated migration cost in USD
+        """
+        # In a real implementation, this would account for the model's actual
+        # egress volume and rebuild time on the target provider
+        return MIGRATION_FIXED_COST + deployment.resource_requirements.memory_gib * MIGRATION_COST_PER_GIB
+    
+    def _check_hibernation(self, deployment: Deployment, now_ts: float) -> Dict:
         """Check if a deployment should be hibernated.
         
         Args:
             deployment: Deployment to check
+            now_ts: Current UNIX timestamp
             
         Returns:
             Hibernation check results
         """
+        policy = deployment.cost_optimization_policy
+        
         # Skip if hibernation is not enabled
-        if not deployment.cost_optimization_policy.hibernation_enabled:
+        if not policy.hibernation_enabled:
             return {"status": "skipped", "reason": "Hibernation not enabled"}
         
         # Check if deployment has been inactive for longer than the idle timeout
-        now = datetime.datetime.utcnow()
-        last_active = deployment.last_active_at or deployment.created_at
-        idle_time = (now - last_active).total_seconds()
-        
-        if idle_time > deployment.cost_optimization_policy.hibernation_idle_timeout:
+        idle_time = now_ts - self._last_active_timestamp(deployment)
+        idle_timeout = policy.hibernation_idle_timeout
+        
+        if idle_time > idle_timeout:
+            # The deployment may have been loaded before its latest activity,
+            # so confirm it is still idle before hibernating it
+            current = self.deployment_service.get_deployment(deployment.id)
+            if not current or current.status != DeploymentStatus.ACTIVE:
+                return {"status": "skipped", "reason": "Deployment is no longer active"}
+            idle_time = now_ts - self._last_active_timestamp(current)
+        
+        if idle_time > idle_timeout:
             # Hibernate deployment
             try:
                 self.deployment_service.hibernate_deployment(deployment.id)
@@ -143,26 +562,52 @@ class CostOptimizer:
                     "estimated_savings": self._estimate_hibernation_savings(deployment),
                 }
             except Exception as e:
-                logger.error(f"Error hibernating deployment {deployment.id}: {e}")
+                logger.error("Error hibernating deployment %s: %s", deployment.id, e)
                 return {"status": "error", "reason": str(e)}
         else:
             return {
                 "status": "active",
                 "idle_time_seconds": idle_time,
-                "hibernation_threshold_seconds": deployment.cost_optimization_policy.hibernation_idle_timeout,
+                "hibernation_threshold_seconds": idle_timeout,
             }
     
-    def _check_spot_instances(self, deployment: Deployment) -> Dict:
+    def _last_active_timestamp(self, deployment: Deployment) -> float:
+        """Get the latest activity seen for a deployment as a UNIX timestamp.
+        
+        A copy of the deployment loaded before its latest activity reports an
+        older timestamp, so the newest timestamp seen for each deployment is
+        remembered and used instead.
+        
+        Args:
+            deployment: Deployment to get the activity timestamp for
+            
+        Returns:
+            UNIX timestamp of the deployment's latest activity
+        """
+        # Timestamps are naive UTC datetimes
+        last_active = deployment.last_active_at or deployment.created_at
+        last_active_ts = last_active.replace(tzinfo=datetime.timezone.utc).timestamp()
+        
+        with self._lookup_cache_lock:
+            last_active_ts = max(last_active_ts, self._last_active_cache.get(deployment.id, last_active_ts))
+            self._last_active_cache[deployment.id] = last_active_ts
+        
+        return last_active_ts
+    
+    def _check_spot_instances(self, deployment: Deployment, pricing_cache: Optional[Dict[str, Dict]] = None) -> Dict:
         """Check if a deployment should use spot/preemptible instances.
         
         Args:
             deployment: Deployment to check
+            pricing_cache: Pre-fetched pricing from _batch_fetch_pricing
             
         Returns:
             Spot instance check results
         """
+        policy = deployment.cost_optimization_policy
+        
         # Skip if spot instances are not enabled
-        if not deployment.cost_optimization_policy.use_spot_instances:
+        if not policy.use_spot_instances:
             return {"status": "skipped", "reason": "Spot instances not enabled"}
         
         # Skip for serverless deployments (handled differently)
@@ -175,9 +620,25 @@ class CostOptimizer:
             return {"status": "already_optimized", "reason": "Already using spot instances"}
         
         # Check spot instance availability and pricing
-        spot_available, spot_price, on_demand_price = self._check_spot_pricing(deployment)
-        
-        if spot_available and spot_price < on_demand_price:
+        key = self._pricing_key(deployment)
+        if pricing_cache is not None and key in pricing_cache["spot"]:
+            spot_available, spot_price, on_demand_price = pricing_cache["spot"][key]
+        else:
+            spot_available, spot_price, on_demand_price = self._get_spot_pricing(deployment)
+        
+        # Weigh the spot price by how often the capacity pool is reclaimed,
+        # according to the deployment's allocation strategy
+        strategy = policy.spot_allocation_strategy
+        interruption_rate = self._estimate_spot_interruption_rate(deployment)
+        if strategy == SpotAllocationStrategy.LOWEST_PRICE:
+            beneficial = spot_price < on_demand_price
+        elif strategy == SpotAllocationStrategy.CAPACITY_OPTIMIZED:
+            beneficial = interruption_rate <= MAX_SPOT_INTERRUPTION_RATE and spot_price < on_demand_price
+        else:  # SpotAllocationStrategy.PRICE_CAPACITY_OPTIMIZED
+            effective_spot_price = spot_price * (1 + interruption_rate * SPOT_INTERRUPTION_COST_FACTOR)
+            beneficial = effective_spot_price < on_demand_price
+        
+        if spot_available and beneficial:
             # Update deployment to use spot instances
             try:
                 # In a real implementation, this would update the Kubernetes deployment
@@ -196,9 +657,11 @@ class CostOptimizer:
                     "spot_price": spot_price,
                     "on_demand_price": on_demand_price,
                     "savings_percentage": savings_percentage,
+                    "allocation_strategy": strategy.value,
+                    "interruption_rate": interruption_rate,
                 }
             except Exception as e:
-                logger.error(f"Error converting deployment {deployment.id} to spot instances: {e}")
+                logger.error("Error converting deployment %s to spot instances: %s", deployment.id, e)
                 return {"status": "error", "reason": str(e)}
         else:
             return {
@@ -207,50 +670,161 @@ class CostOptimizer:
                 "spot_available": spot_available,
                 "spot_price": spot_price if spot_available else None,
                 "on_demand_price": on_demand_price,
+                "allocation_strategy": strategy.value,
+                "interruption_rate": interruption_rate,
+            }
+    
+    def _plan_fleet_resource_sizing(self, deployments: List[Deployment], executor: ThreadPoolExecutor) -> Dict[str, Dict]:
+        """Size every deployment of a batch, fetching utilization concurrently.
+        
+        A deployment whose utilization lookup fails or whose resources cannot
+        be parsed is left out of the plan, so its resource sizing check
+        retries it and reports the error.
+        
+        Args:
+            deployments: Deployments to size
+            executor: Executor to run the utilization lookups on concurrently
+            
+        Returns:
+            Sizing plan from _plan_resource_sizing
+        """
+        futures = [executor.submit(self._get_cached_resource_utilization, d) for d in deployments]
+        
+        sized_deployments = []
+        utilization = []
+        for deployment, future in zip(deployments, futures):
+            try:
+                deployment_utilization = future.result()
+                deployment.resource_requirements.cpu_cores
+                deployment.resource_requirements.memory_gib
+            except Exception as e:
+                logger.warning("Error pre-computing resource sizing for deployment %s: %s", deployment.id, e)
+                continue
+            
+            sized_deployments.append(deployment)
+            utilization.append(deployment_utilization)
+        
+        return self._plan_resource_sizing(sized_deployments, utilization)
+    
+    def _plan_resource_sizing(
+        self, deployments: List[Deployment], utilization: List[Tuple[float, float]]
+    ) -> Dict[str, Dict]:
+        """Compute right-sized resources for a set of deployments in one pass.
+        
+        Args:
+            deployments: Deployments to size
+            utilization: CPU and memory utilization percentages per deployment
+            
+        Returns:
+            Dictionary mapping deployment IDs to utilization, current and new
+            CPU and memory, and which of the two are over-provisioned
+        """
+        if not deployments:
+            return {}
+        
+        count = len(deployments)
+        utilization = np.array(utilization, dtype=np.float64).reshape(count, 2)
+        current_cpu = np.fromiter(
+            (d.resource_requirements.cpu_cores for d in deployments), dtype=np.float64, count=count
+        )
+        current_memory = np.fromiter(
+            (d.resource_requirements.memory_gib for d in deployments), dtype=np.float64, count=count
+        )
+        
+        # Resources below 30% utilization are over-provisioned
+        cpu_over_provisioned = utilization[:, 0] < 30
+        memory_over_provisioned = utilization[:, 1] < 30
+        
+        # Reduce by 25%, but not below 0.25 vCPU or 0.5 Gi
+        new_cpu = np.where(cpu_over_provisioned, np.maximum(0.25, current_cpu * 0.75), current_cpu)
+        new_memory = np.where(memory_over_provisioned, np.maximum(0.5, current_memory * 0.75), current_memory)
+        
+        columns = zip(
+            utilization.tolist(),
+            current_cpu.tolist(),
+            current_memory.tolist(),
+            new_cpu.tolist(),
+            new_memory.tolist(),
+            cpu_over_provisioned.tolist(),
+            memory_over_provisioned.tolist(),
+        )
+        return {
+            deployment.id: {
+                "cpu_utilization": util[0],
+                "memory_utilization": util[1],
+                "current_cpu": cpu,
+                "current_memory": memory,
+                "new_cpu": cpu_after,
+                "new_memory": memory_after,
+                "cpu_over_provisioned": cpu_over,
+                "memory_over_provisioned": memory_over,
             }
+            for deployment, (util, cpu, memory, cpu_after, memory_after, cpu_over, memory_over) in zip(
+                deployments, columns
+            )
+        }
     
-    def _check_resource_sizing(self, deployment: Deployment) -> Dict:
+    def _estimate_spot_interruption_rate(self, deployment: Deployment) -> float:
+        """Estimate how often a deployment's spot capacity would be interrupted.
+        
+        Args:
+            deployment: Deployment to estimate the interruption rate for
+            
+        Returns:
+            Expected fraction of spot instances interrupted per hour
+        """
+        # In a real implementation, this would come from the cloud provider's
+        # spot placement scores or interruption frequency data
+        if "spot_interruption_rate" in deployment.metadata:
+            return float(deployment.metadata["spot_interruption_rate"])
+        
+        # GPU capacity pools are smaller and reclaimed more often
+        if deployment.resource_requirements.gpu:
+            return 0.15
+        return 0.05
+    
+    def _check_resource_sizing(self, deployment: Deployment, sizing_plan: Optional[Dict[str, Dict]] = None) -> Dict:
         """Check if a deployment's resources should be resized.
         
         Args:
             deployment: Deployment to check
+            sizing_plan: Pre-computed sizing from _plan_resource_sizing
             
         Returns:
             Resource sizing check results
         """
-        # Get resource utilization metrics
-        # In a real implementation, this would query metrics from a monitoring system
-        cpu_utilization, memory_utilization = self._get_resource_utilization(deployment)
+        plan = sizing_plan.get(deployment.id) if sizing_plan is not None else None
+        if plan is None:
+            # Get resource utilization metrics
+            # In a real implementation, this would query metrics from a monitoring system
+            try:
+                utilization = self._get_cached_resource_utilization(deployment)
+                plan = self._plan_resource_sizing([deployment], [utilization])[deployment.id]
+            except Exception as e:
+                logger.error("Error sizing deployment %s: %s", deployment.id, e)
+                return {"status": "error", "reason": str(e)}
         
-        # Check if resources are over-provisioned
-        cpu_over_provisioned = cpu_utilization < 30  # Less than 30% CPU utilization
-        memory_over_provisioned = memory_utilization < 30  # Less than 30% memory utilization
+        cpu_utilization = plan["cpu_utilization"]
+        memory_utilization = plan["memory_utilization"]
+        cpu_over_provisioned = plan["cpu_over_provisioned"]
+        memory_over_provisioned = plan["memory_over_provisioned"]
         
         if cpu_over_provisioned or memory_over_provisioned:
-            # Calculate new resource requirements
-            current_cpu = float(deployment.resource_requirements.cpu)
-            current_memory = float(deployment.resource_requirements.memory.rstrip("Gi"))
-            
-            new_cpu = current_cpu
-            new_memory = current_memory
-            
-            if cpu_over_provisioned:
-                # Reduce CPU by 25%, but not below 0.25 vCPU
-                new_cpu = max(0.25, current_cpu * 0.75)
-            
-            if memory_over_provisioned:
-                # Reduce memory by 25%, but not below 0.5 Gi
-                new_memory = max(0.5, current_memory * 0.75)
+            current_cpu = plan["current_cpu"]
+            current_memory = plan["current_memory"]
+            new_cpu = plan["new_cpu"]
+            new_memory = plan["new_memory"]
             
             # Update deployment resource requirements
+            requirements = deployment.resource_requirements
             try:
                 self.deployment_service.update_deployment(
                     deployment_id=deployment.id,
                     resource_requirements={
                         "cpu": str(new_cpu),
                         "memory": f"{new_memory}Gi",
-                        "gpu": deployment.resource_requirements.gpu,
-                        "timeout": deployment.resource_requirements.timeout,
+                        "gpu": requirements.gpu,
+                        "timeout": requirements.timeout,
                     },
                 )
                 
@@ -273,7 +847,7 @@ class CostOptimizer:
                     },
                 }
             except Exception as e:
-                logger.error(f"Error resizing deployment {deployment.id}: {e}")
+                logger.error("Error resizing deployment %s: %s", deployment.id, e)
                 return {"status": "error", "reason": str(e)}
         else:
             return {
@@ -282,11 +856,19 @@ class CostOptimizer:
                 "memory_utilization": memory_utilization,
             }
     
-    def _check_multi_cloud_arbitrage(self, deployment: Deployment) -> Dict:
+    def _check_multi_cloud_arbitrage(
+        self,
+        deployment: Deployment,
+        pricing_cache: Optional[Dict[str, Dict]] = None,
+        migration_budget: Optional[MigrationBudget] = None,
+    ) -> Dict:
         """Check if a deployment should be moved to a different cloud provider.
         
         Args:
             deployment: Deployment to check
+            pricing_cache: Pre-fetched pricing from _batch_fetch_pricing
+            migration_budget: Migration budget to reserve the migration's cost
+                from (unlimited if not given)
             
         Returns:
             Multi-cloud arbitrage check results
@@ -296,14 +878,32 @@ class CostOptimizer:
         current_region = deployment.metadata.get("cloud_region", "us-east-1")
         
         # Get pricing for current and alternative providers
-        pricing_data = self._get_multi_cloud_pricing(deployment, current_provider, current_region)
+        key = self._pricing_key(deployment)
+        if pricing_cache is not None and key in pricing_cache["multi_cloud"]:
+            pricing_data = pricing_cache["multi_cloud"][key]
+        else:
+            pricing_data = self._get_cached_multi_cloud_pricing(deployment)
         
         # Find the cheapest provider
-        cheapest_provider = min(pricing_data, key=lambda x: pricing_data[x]["price"])
+        cheapest_provider, cheapest_info = min(pricing_data.items(), key=lambda item: item[1]["price"])
+        current_price = pricing_data[current_provider]["price"]
+        cheapest_price = cheapest_info["price"]
         
-        if cheapest_provider != current_provider and pricing_data[cheapest_provider]["price"] < pricing_data[current_provider]["price"] * 0.9:
+        if cheapest_provider != current_provider and cheapest_price < current_price * 0.9:
             # The cheapest provider is at least 10% cheaper than the current provider
             
+            # Leave the migration for a later run if it does not fit in the budget
+            migration_cost = self._estimate_migration_cost(deployment)
+            if migration_budget is not None and not migration_budget.reserve(migration_cost):
+                return {
+                    "status": "deferred",
+                    "reason": "Migration budget exhausted",
+                    "from_provider": current_provider,
+                    "to_provider": cheapest_provider,
+                    "from_price": current_price,
+                    "to_price": cheapest_price,
+                }
+            
             # In a real implementation, this would migrate the deployment to the new provider
             # For this implementation, we'll just update the metadata
             
@@ -312,36 +912,35 @@ class CostOptimizer:
                     deployment_id=deployment.id,
                     metadata={
                         "cloud_provider": cheapest_provider,
-                        "cloud_region": pricing_data[cheapest_provider]["region"],
+                        "cloud_region": cheapest_info["region"],
                     },
                 )
                 
-                savings_percentage = (
-                    (pricing_data[current_provider]["price"] - pricing_data[cheapest_provider]["price"])
-                    / pricing_data[current_provider]["price"]
-                ) * 100
+                savings_percentage = ((current_price - cheapest_price) / current_price) * 100
                 
                 return {
                     "status": "migrated",
                     "from_provider": current_provider,
                     "to_provider": cheapest_provider,
                     "from_region": current_region,
-                    "to_region": pricing_data[cheapest_provider]["region"],
-                    "from_price": pricing_data[current_provider]["price"],
-                    "to_price": pricing_data[cheapest_provider]["price"],
+                    "to_region": cheapest_info["region"],
+                    "from_price": current_price,
+                    "to_price": cheapest_price,
                     "savings_percentage": savings_percentage,
                 }
             except Exception as e:
-                logger.error(f"Error migrating deployment {deployment.id} to {cheapest_provider}: {e}")
+                if migration_budget is not None:
+                    migration_budget.release(migration_cost)
+                logger.error("Error migrating deployment %s to %s: %s", deployment.id, cheapest_provider, e)
                 return {"status": "error", "reason": str(e)}
         else:
             return {
                 "status": "optimal",
                 "current_provider": current_provider,
                 "current_region": current_region,
-                "current_price": pricing_data[current_provider]["price"],
+                "current_price": current_price,
                 "cheapest_provider": cheapest_provider,
-                "cheapest_price": pricing_data[cheapest_provider]["price"],
+                "cheapest_price": cheapest_price,
             }
     
     def _estimate_hibernation_savings(self, deployment: Deployment) -> float:
@@ -359,11 +958,12 @@ class CostOptimizer:
         # For this implementation, we'll use a simple heuristic
         if deployment.deployment_type == DeploymentType.KUBERNETES:
             # Kubernetes deployments have higher fixed costs
-            cpu_cost = float(deployment.resource_requirements.cpu) * 30  # $30 per CPU per month
-            memory_cost = float(deployment.resource_requirements.memory.rstrip("Gi")) * 5  # $5 per GB per month
+            requirements = deployment.resource_requirements
+            cpu_cost = requirements.cpu_cores * 30  # $30 per CPU per month
+            memory_cost = requirements.memory_gib * 5  # $5 per GB per month
             gpu_cost = 0
-            if deployment.resource_requirements.gpu:
-                gpu_cost = float(deployment.resource_requirements.gpu) * 300  # $300 per GPU per month
+            if requirements.gpu:
+                gpu_cost = float(requirements.gpu) * 300  # $300 per GPU per month
             
             return cpu_cost + memory_cost + gpu_cost
         else:  # DeploymentType.SERVERLESS
@@ -7,14 +7,30 @@ import datetime
 import json
 import logging
 import os
+import threading
 import time
-from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
 
 from core.deployment import DeploymentService
 from core.models import Deployment, DeploymentStatus, DeploymentType
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+# How long each kind of price stays fresh, as a multiple of the price check
+# interval. GPU prices fluctuate more than CPU and memory prices.
+PRICE_TTL_MULTIPLIERS = {"cpu": 2.0, "memory": 2.0, "gpu": 0.5}
+
+# Default upper bound on the number of deployments migrated at once
+MAX_MIGRATION_WORKERS = 8
+
 
 class MultiCloudArbitrage:
     """Service for optimizing costs through multi-cloud arbitrage."""
@@ -24,6 +40,7 @@ class MultiCloudArbitrage:
         deployment_service: DeploymentService,
         arbitrage_data_path: str = "/tmp/ai-deploy-platform/arbitrage_data",
         price_check_interval: int = 3600,  # 1 hour
+        max_workers: Optional[int] = None,
     ):
         """Initialize the multi-cloud arbitrage service.
         
@@ -31,17 +48,67 @@ class MultiCloudArbitrage:
             deployment_service: Service for managing deployments
             arbitrage_data_path: Path to store arbitrage data
             price_check_interval: Interval in seconds between price checks
+            max_workers: Maximum number of deployments to migrate at once
+                (defaults to one per deployment, up to MAX_MIGRATION_WORKERS)
         """
         self.deployment_service = deployment_service
         self.arbitrage_data_path = arbitrage_data_path
         self.price_check_interval = price_check_interval
+        self.max_workers = max_workers
         
         # Create arbitrage data directory if it doesn't exist
         os.makedirs(arbitrage_data_path, exist_ok=True)
         
-        # Initialize price tracking
+        # Initialize price tracking. The parsed file is cached and reloaded only
+        # when the file's modification time or size changes.
         self.price_tracking_path = os.path.join(arbitrage_data_path, "price_tracking.json")
+        self._price_cache: Optional[Dict] = None
+        self._price_cache_stat: Optional[Tuple[int, int]] = None
+        self._price_cache_lock = threading.Lock()
+        self._price_matrix_cache: Optional[Tuple] = None
+        
+        # Random source for simulated price fluctuations, kept separate from
+        # the global random module state
+        self._rng = np.random.default_rng()
         self._init_price_tracking()
+        
+        # Background price refresh, started with start_price_refresh
+        self._price_subscribers: List[Callable[[Dict], None]] = []
+        self._price_refresh_thread: Optional[threading.Thread] = None
+        self._price_refresh_stop = threading.Event()
+    
+    def subscribe_price_updates(self, callback: Callable[[Dict], None]) -> None:
+        """Register a callback to run after the background refresh updates prices.
+        
+        Args:
+            callback: Function called with the updated price tracking data,
+                which it must not modify
+        """
+        self._price_subscribers.append(callback)
+    
+    def start_price_refresh(self) -> None:
+        """Refresh stale prices in a background thread.
+        
+        While the refresh runs, arbitrage checks use the prices it keeps up to
+        date instead of checking for stale prices themselves.
+        """
+        if self._price_refresh_thread is not None:
+            return
+        
+        self._price_refresh_stop.clear()
+        self._price_refresh_thread = threading.Thread(
+            target=self._price_refresh_loop, name="multi-cloud-price-refresh", daemon=True
+        )
+        self._price_refresh_thread.start()
+    
+    def stop_price_refresh(self) -> None:
+        """Stop the background price refresh and wait for it to exit."""
+        if self._price_refresh_thread is None:
+            return
+        
+        self._price_refresh_stop.set()
+        self._price_refresh_thread.join()
+        self._price_refresh_thread = None
     
     def check_arbitrage_opportunities(self) -> Dict[str, Dict]:
         """Check for arbitrage opportunities across all deployments.
@@ -54,6 +121,19 @@ class MultiCloudArbitrage:
         # Get all deployments
         deployments = self.deployment_service.list_deployments()
         
+        # Refresh and load pricing once for the whole pass, and price every
+        # candidate deployment in one vectorized step
+        if self._price_refresh_thread is None:
+            self._update_pricing_data_if_needed()
+        price_data = self._load_price_tracking()
+        candidates = [
+            deployment
+            for deployment in deployments
+            if deployment.cost_optimization_policy.multi_cloud_enabled
+            and deployment.status == DeploymentStatus.ACTIVE
+        ]
+        batch_pricing = self._batch_get_pricing_data(candidates, price_data)
+        
         # Check each deployment for arbitrage opportunities
         results = {}
         for deployment in deployments:
@@ -66,7 +146,9 @@ class MultiCloudArbitrage:
                 continue
             
             try:
-                result = self.check_deployment_arbitrage(deployment.id)
+                result = self.check_deployment_arbitrage(
+                    deployment.id, price_data=price_data, pricing_data=batch_pricing.get(deployment.id)
+                )
                 results[deployment.id] = result
             except Exception as e:
                 logger.error(f"Error checking arbitrage for deployment {deployment.id}: {e}")
@@ -74,11 +156,20 @@ class MultiCloudArbitrage:
         
         return results
     
-    def check_deployment_arbitrage(self, deployment_id: str) -> Dict:
+    def check_deployment_arbitrage(
+        self,
+        deployment_id: str,
+        price_data: Optional[Dict] = None,
+        pricing_data: Optional[Dict[str, Dict]] = None,
+    ) -> Dict:
         """Check for arbitrage opportunities for a specific deployment.
         
         Args:
             deployment_id: ID of the deployment to check
+            price_data: Up-to-date price tracking data, if the caller has
+                already loaded it
+            pricing_data: The deployment's per-provider pricing computed from
+                price_data, if the caller has already computed it
             
         Returns:
             Arbitrage check results
@@ -102,10 +193,12 @@ class MultiCloudArbitrage:
         current_region = deployment.metadata.get("cloud_region", "us-east-1")
         
         # Check if we need to update pricing data
-        self._update_pricing_data_if_needed()
+        if price_data is None and self._price_refresh_thread is None:
+            self._update_pricing_data_if_needed()
         
         # Get pricing data for all providers
-        pricing_data = self._get_pricing_data(deployment)
+        if pricing_data is None:
+            pricing_data = self._get_deployment_pricing(deployment, price_data)
         
         # Find the cheapest provider
         cheapest_provider = min(pricing_data, key=lambda x: pricing_data[x]["price"])
@@ -155,13 +248,23 @@ class MultiCloudArbitrage:
                 "pricing_data": pricing_data,
             }
     
-    def migrate_deployment(self, deployment_id: str, target_provider: str, target_region: str) -> Dict:
+    def migrate_deployment(
+        self,
+        deployment_id: str,
+        target_provider: str,
+        target_region: str,
+        *,
+        pricing_snapshot: Optional[Dict[str, Dict]] = None,
+    ) -> Dict:
         """Migrate a deployment to a different cloud provider.
         
         Args:
             deployment_id: ID of the deployment to migrate
             target_provider: Target cloud provider
             target_region: Target cloud region
+            pricing_snapshot: The "pricing_data" returned by
+                check_deployment_arbitrage, to report the migration's prices
+                without pricing the deployment again
             
         Returns:
             Migration results
@@ -206,7 +309,9 @@ class MultiCloudArbitrage:
             )
             
             # Get pricing data for before/after comparison
-            pricing_data = self._get_pricing_data(deployment)
+            pricing_data = pricing_snapshot
+            if pricing_data is None:
+                pricing_data = self._get_deployment_pricing(deployment)
             current_price = pricing_data[current_provider]["price"]
             target_price = pricing_data[target_provider]["price"]
             savings_percentage = ((current_price - target_price) / current_price) * 100
@@ -226,6 +331,47 @@ class MultiCloudArbitrage:
             logger.error(f"Error migrating deployment {deployment_id}: {e}")
             return {"status": "error", "reason": str(e)}
     
+    def migrate_deployments(
+        self,
+        migrations: Dict[str, Tuple[str, str]],
+        pricing_snapshots: Optional[Dict[str, Dict[str, Dict]]] = None,
+    ) -> Dict[str, Dict]:
+        """Migrate several deployments to different cloud providers at once.
+        
+        Migrations are independent of each other and mostly wait on the
+        deployment service and cloud provider APIs, so they run concurrently.
+        
+        Args:
+            migrations: Dictionary mapping deployment IDs to the target cloud
+                provider and region
+            pricing_snapshots: Dictionary mapping deployment IDs to the
+                "pricing_data" returned by check_deployment_arbitrage
+            
+        Returns:
+            Dictionary mapping deployment IDs to migration results
+        """
+        if not migrations:
+            return {}
+        
+        pricing_snapshots = pricing_snapshots or {}
+        
+        def migrate(deployment_id: str) -> Dict:
+            target_provider, target_region = migrations[deployment_id]
+            try:
+                return self.migrate_deployment(
+                    deployment_id,
+                    target_provider,
+                    target_region,
+                    pricing_snapshot=pricing_snapshots.get(deployment_id),
+                )
+            except Exception as e:
+                logger.error(f"Error migrating deployment {deployment_id}: {e}")
+                return {"status": "error", "reason": str(e)}
+        
+        max_workers = self.max_workers or min(MAX_MIGRATION_WORKERS, len(migrations))
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="multi-cloud-migration") as executor:
+            return dict(zip(migrations, executor.map(migrate, migrations)))
+    
     def _init_price_tracking(self) -> None:
         """Initialize price tracking data."""
         if not os.path.exists(self.price_tracking_path):
@@ -261,11 +407,26 @@ class MultiCloudArbitrage:
     def _load_price_tracking(self) -> Dict:
         """Load price tracking data.
         
+        The parsed data is shared between callers and must not be modified
+        except by _update_pricing_data.
+        
         Returns:
             Price tracking data
         """
-        with open(self.price_tracking_path, "r") as f:
-            return json.load(f)
+        stat = os.stat(self.price_tracking_path)
+        file_stat = (stat.st_mtime_ns, stat.st_size)
+        
+        with self._price_cache_lock:
+            if self._price_cache is not None and self._price_cache_stat == file_stat:
+                return self._price_cache
+            
+            with open(self.price_tracking_path, "rb") as f:
+                data = f.read()
+            price_data = orjson.loads(data) if orjson is not None else json.loads(data)
+            
+            self._price_cache = price_data
+            self._price_cache_stat = file_stat
+            return price_data
     
     def _save_price_tracking(self, price_data: Dict) -> None:
         """Save price tracking data.
@@ -273,57 +434,102 @@ class MultiCloudArbitrage:
         Args:
             price_data: Price tracking data
         """
-        with open(self.price_tracking_path, "w") as f:
-            json.dump(price_data, f, indent=2)
+        if orjson is not None:
+            data = orjson.dumps(price_data)
+        else:
+            data = json.dumps(price_data).encode()
+        
+        with self._price_cache_lock:
+            with open(self.price_tracking_path, "wb") as f:
+                f.write(data)
+            
+            stat = os.stat(self.price_tracking_path)
+            self._price_cache = price_data
+            self._price_cache_stat = (stat.st_mtime_ns, stat.st_size)
+    
+    def _price_refresh_loop(self) -> None:
+        """Refresh stale prices until stopped, notifying subscribers of updates."""
+        # Wake up as often as the shortest-lived kind of price goes stale
+        interval = self.price_check_interval * min(PRICE_TTL_MULTIPLIERS.values())
+        while True:
+            try:
+                if self._update_pricing_data_if_needed():
+                    price_data = self._load_price_tracking()
+                    for callback in self._price_subscribers:
+                        try:
+                            callback(price_data)
+                        except Exception as e:
+                            logger.error(f"Error in price update subscriber: {e}")
+            except Exception as e:
+                logger.error(f"Error refreshing cloud provider prices: {e}")
+            
+            if self._price_refresh_stop.wait(interval):
+                return
     
-    def _update_pricing_data_if_needed(self) -> None:
-        """Update pricing data if it's stale."""
+    def _update_pricing_data_if_needed(self) -> bool:
+        """Update the prices that are stale.
+        
+        Each provider region's CPU, memory and GPU prices go stale separately,
+        after price_check_interval scaled by PRICE_TTL_MULTIPLIERS.
+        
+        Returns:
+            Whether any prices were updated
+        """
         # Load price tracking data
         price_data = self._load_price_tracking()
         
-        # Check if we need to update
-        last_update = price_data["last_update"]
-        if last_update is None:
-            need_update = True
-        else:
-            last_update_time = datetime.datetime.fromisoformat(last_update)
-            now = datetime.datetime.utcnow()
-            seconds_since_update = (now - last_update_time).total_seconds()
-            need_update = seconds_since_update > self.price_check_interval
+        # Prices refreshed before per-price tracking was added count as
+        # refreshed at the last full update
+        last_refresh = price_data.get("last_refresh", {})
+        default_refresh = None
+        if price_data["last_update"] is not None:
+            default_refresh = (
+                datetime.datetime.fromisoformat(price_data["last_update"])
+                .replace(tzinfo=datetime.timezone.utc)
+                .timestamp()
+            )
         
-        if need_update:
-            self._update_pricing_data(price_data)
+        # Check which prices need updating
+        now = time.time()
+        stale = []
+        for provider, provider_data in price_data["providers"].items():
+            for region in provider_data["regions"]:
+                for kind, multiplier in PRICE_TTL_MULTIPLIERS.items():
+                    refreshed_at = last_refresh.get(f"{provider}/{region}/{kind}", default_refresh)
+                    if refreshed_at is None or now - refreshed_at > self.price_check_interval * multiplier:
+                        stale.append((provider, region, kind))
+        
+        if stale:
+            self._update_pricing_data(price_data, stale)
+        return bool(stale)
     
-    def _update_pricing_data(self, price_data: Dict) -> None:
+    def _update_pricing_data(self, price_data: Dict, stale: Optional[List[Tuple[str, str, str]]] = None) -> None:
         """Update pricing data with current prices.
         
         Args:
             price_data: Price tracking data to update
+            stale: (provider, region, resource kind) prices to update; all
+                prices are updated if not given
         """
         # In a real implementation, this would query cloud provider APIs for current pricing
         # For this implementation, we'll simulate price fluctuations
         
-        import random
-        
-        random.seed(int(time.time()))
-        
-        # Update prices for each provider and region
-        for provider in price_data["providers"]:
-            for region in price_data["providers"][provider]["regions"]:
-                # Apply random fluctuation of ±5%
-                cpu_price = price_data["providers"][provider]["regions"][region]["cpu"]
-                memory_price = price_data["providers"][provider]["regions"][region]["memory"]
-                gpu_price = price_data["providers"][provider]["regions"][region]["gpu"]
-                
-                price_data["providers"][provider]["regions"][region]["cpu"] = cpu_price * random.uniform(
-                    0.95, 1.05
-                )
-                price_data["providers"][provider]["regions"][region]["memory"] = memory_price * random.uniform(
-                    0.95, 1.05
-                )
-                price_data["providers"][provider]["regions"][region]["gpu"] = gpu_price * random.uniform(
-                    0.95, 1.05
-                )
+        if stale is None:
+            stale = [
+                (provider, region, kind)
+                for provider in price_data["providers"]
+                for region in price_data["providers"][provider]["regions"]
+                for kind in PRICE_TTL_MULTIPLIERS
+            ]
+        
+        # Update each stale price, applying a random fluctuation of ±5%
+        now = time.time()
+        last_refresh = price_data.setdefault("last_refresh", {})
+        fluctuations = self._rng.uniform(0.95, 1.05, size=len(stale)).tolist()
+        for (provider, region, kind), fluctuation in zip(stale, fluctuations):
+            region_prices = price_data["providers"][provider]["regions"][region]
+            region_prices[kind] = region_prices[kind] * fluctuation
+            last_refresh[f"{provider}/{region}/{kind}"] = now
         
         # Update last update time
         price_data["last_update"] = datetime.datetime.utcnow().isoformat()
@@ -331,23 +537,144 @@ class MultiCloudArbitrage:
         # Save updated price data
         self._save_price_tracking(price_data)
         
-        logger.info("Updated cloud provider pricing data")
+        logger.info(f"Updated {len(stale)} cloud provider prices")
+    
+    def _price_matrix(self, price_data: Dict) -> Tuple[Tuple[List[str], List[List[str]], np.ndarray, List[int]], Dict]:
+        """Flatten price tracking data into a matrix of per-region unit prices.
+        
+        The matrix is rebuilt only when the price data is reloaded or updated,
+        together with a fresh memo for the pricing of each resource shape. The
+        two are cached and returned as one, so the memo always belongs to the
+        matrix it was priced from.
+        
+        Args:
+            price_data: Price tracking data
+            
+        Returns:
+            Tuple of the matrix and the pricing memoized per resource shape.
+            The matrix is a tuple of provider names, region names per provider,
+            an array with one (cpu, memory, gpu) price row per provider region,
+            and the row offset at which each provider's regions start.
+        """
+        version = (id(price_data), price_data["last_update"])
+        cached = self._price_matrix_cache
+        if cached is not None and cached[0] == version:
+            return cached[1], cached[2]
+        
+        providers = list(price_data["providers"])
+        regions = []
+        rows = []
+        offsets = []
+        for provider in providers:
+            provider_regions = price_data["providers"][provider]["regions"]
+            offsets.append(len(rows))
+            regions.append(list(provider_regions))
+            for region in provider_regions:
+                region_prices = provider_regions[region]
+                rows.append((region_prices["cpu"], region_prices["memory"], region_prices["gpu"]))
+        offsets.append(len(rows))
+        
+        matrix = (providers, regions, np.array(rows, dtype=np.float64).reshape(len(rows), 3), offsets)
+        shape_pricing: Dict[Tuple[float, float, float], Dict[str, Dict]] = {}
+        self._price_matrix_cache = (version, matrix, shape_pricing)
+        return matrix, shape_pricing
     
-    def _get_pricing_data(self, deployment: Deployment) -> Dict[str, Dict]:
+    def _batch_get_pricing_data(self, deployments: List[Deployment], price_data: Dict) -> Dict[str, Dict[str, Dict]]:
+        """Get pricing for multiple cloud providers for many deployments at once.
+        
+        Deployments with the same (cpu, memory, gpu) requirements share their
+        pricing, which is memoized until the price data changes. Shapes not
+        priced yet are priced in every region with one matrix product, then
+        the cheapest region of each provider is picked per shape.
+        
+        Args:
+            deployments: Deployments to get pricing for
+            price_data: Price tracking data
+            
+        Returns:
+            Dictionary mapping deployment IDs to the same per-provider pricing
+            information as _get_deployment_pricing. Deployments of the same
+            shape share one pricing dictionary, which must not be modified.
+        """
+        if not deployments:
+            return {}
+        
+        (providers, regions, unit_prices, offsets), shape_pricing = self._price_matrix(price_data)
+        
+        shapes = {}
+        for d in deployments:
+            shapes[d.id] = (
+                d.resource_requirements.cpu_cores,
+                d.resource_requirements.memory_gib,
+                float(d.resource_requirements.gpu) if d.resource_requirements.gpu else 0.0,
+            )
+        new_shapes = [shape for shape in dict.fromkeys(shapes.values()) if shape not in shape_pricing]
+        
+        if new_shapes:
+            resources = np.array(new_shapes, dtype=np.float64).reshape(len(new_shapes), 3)
+            
+            # Total price of each shape in each provider region
+            totals = resources @ unit_prices.T
+            
+            new_pricing = [{} for _ in new_shapes]
+            for index, provider in enumerate(providers):
+                start, end = offsets[index], offsets[index + 1]
+                if start == end:
+                    continue
+                
+                provider_totals = totals[:, start:end]
+                cheapest = provider_totals.argmin(axis=1)
+                cheapest_prices = provider_totals[np.arange(len(new_shapes)), cheapest]
+                
+                for pricing, region_index, price in zip(new_pricing, cheapest.tolist(), cheapest_prices.tolist()):
+                    cpu_price, memory_price, gpu_price = unit_prices[start + region_index].tolist()
+                    pricing[provider] = {
+                        "region": regions[index][region_index],
+                        "price": price,
+                        "cpu_price": cpu_price,
+                        "memory_price": memory_price,
+                        "gpu_price": gpu_price,
+                    }
+            
+            shape_pricing.update(zip(new_shapes, new_pricing))
+        
+        return {deployment_id: shape_pricing[shape] for deployment_id, shape in shapes.items()}
+    
+    def _get_deployment_pricing(self, deployment: Deployment, price_data: Optional[Dict] = None) -> Dict[str, Dict]:
         """Get pricing for multiple cloud providers for a specific deployment.
         
+        Uses the same price matrix as _batch_get_pricing_data instead of
+        walking every provider region in Python.
+        
         Args:
             deployment: Deployment to get pricing for
+            price_data: Price tracking data, loaded if not given
+            
+        Returns:
+            Dictionary mapping provider names to the cheapest region, its total
+            price and its per-resource prices
+        """
+        if price_data is None:
+            price_data = self._load_price_tracking()
+        return self._batch_get_pricing_data([deployment], price_data)[deployment.id]
+    
+    def _get_pricing_data(self, deployment: Deployment, price_data: Optional[Dict] = None) -> Dict[str, Dict]:
+        """Get pricing for multiple cloud providers for a specific deployment.
+        
+        Args:
+            deployment: Deployment to get pricing for
+            price_data: Price tracking data, loaded if not given
             
         Returns:
             Dictionary mapping provider names to pricing information
         """
         # Load price tracking data
-        price_data = self._load_price_tracking()
+        if price_data is None:
+            price_data = self._load_price_tracking()
         
         # Calculate resource requirements
-        cpu = float(deployment.resource_requirements.cpu)
-        memory = float(deployment.resource_requirements.memory.rstrip("Gi"))
+        cpu = deployment.resource_requirements.cpu_cores
+        memory = deployment.resource_requirements.memory_gib
         gpu = 0
         if deployment.resource_requirements.gpu:
             gpu = float(deployment.resource_requirements.gpu)
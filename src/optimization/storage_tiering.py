@@ -3,21 +3,81 @@ Storage tiering module for the AI model deployment platform.
 This module provides functionality for optimizing storage costs through tiering.
 """
 
+import atexit
 import datetime
+import errno
 import json
 import logging
+import math
 import os
-import shutil
-from typing import Dict, List, Optional, Tuple
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple, Union
 
 from core.models import Model, OptimizedModel
 from core.repository import ModelRepository
 
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+SECONDS_PER_DAY = 86400
+
+# Seconds since the last access after which a model is infrequently accessed,
+# and after which it is rarely accessed
+INFREQUENT_AFTER = 7 * SECONDS_PER_DAY
+RARE_AFTER = 30 * SECONDS_PER_DAY
+
+# Recent accesses are tracked as a count that decays exponentially over a
+# 7-day window. A model is frequent once its decayed count reaches that of 10
+# accesses spread evenly over the window.
+ACCESS_RATE_WINDOW = 7 * SECONDS_PER_DAY
+FREQUENT_RECENT_ACCESSES = 10 * (1 - math.exp(-1))
+
+# Default upper bound on the number of models whose storage is optimized at once
+MAX_STORAGE_WORKERS = 16
+
+# Recorded accesses are appended to a log, which is compacted into the access
+# tracking file after this many accesses, and when the process exits
+ACCESS_COMPACTION_THRESHOLD = 1000
+
+# Seconds a computed access pattern stays valid while the model is not
+# accessed. Without accesses a pattern can only cool down, and a rare model
+# cannot cool down further.
+ACCESS_PATTERN_TTLS = {"frequent": 300, "infrequent": 3600, "rare": SECONDS_PER_DAY}
+
+
+def _to_timestamp(value: Union[int, str]) -> int:
+    """Convert an access time to a UNIX timestamp.
+    
+    Access tracking data written before timestamps were used holds naive UTC
+    ISO 8601 strings instead.
+    """
+    if isinstance(value, str):
+        return int(datetime.datetime.fromisoformat(value).replace(tzinfo=datetime.timezone.utc).timestamp())
+    return value
+
+
+def _decay(recent_accesses: float, elapsed: float) -> float:
+    """Decay a recent access count over the given number of seconds."""
+    return recent_accesses * math.exp(-max(elapsed, 0) / ACCESS_RATE_WINDOW)
+
 
 class StorageTiering:
-    """Service for optimizing storage costs through tiering."""
+    """Service for optimizing storage costs through tiering.
+    
+    Access tracking is kept in memory and written back to disk, so only one
+    instance, in one process, may use a storage data path at a time.
+    """
     
     def __init__(
         self,
@@ -26,6 +86,7 @@ class StorageTiering:
         hot_storage_path: str = "/tmp/ai-deploy-platform/hot_storage",
         cold_storage_path: str = "/tmp/ai-deploy-platform/cold_storage",
         archive_storage_path: str = "/tmp/ai-deploy-platform/archive_storage",
+        max_workers: Optional[int] = None,
     ):
         """Initialize the storage tiering service.
         
@@ -35,22 +96,66 @@ class StorageTiering:
             hot_storage_path: Path for frequently accessed models
             cold_storage_path: Path for infrequently accessed models
             archive_storage_path: Path for rarely accessed models
+            max_workers: Maximum number of models to optimize at once
+                (defaults to one per model, up to MAX_STORAGE_WORKERS)
+            
+        Raises:
+            RuntimeError: If another instance is using storage_data_path
         """
         self.model_repository = model_repository
         self.storage_data_path = storage_data_path
         self.hot_storage_path = hot_storage_path
         self.cold_storage_path = cold_storage_path
         self.archive_storage_path = archive_storage_path
+        self.max_workers = max_workers
+        
+        # Tier of each tier directory, for looking up a model's tier by the
+        # directory it is stored in
+        self._tier_by_dir = {
+            os.path.normpath(hot_storage_path): "hot",
+            os.path.normpath(cold_storage_path): "cold",
+            os.path.normpath(archive_storage_path): "archive",
+        }
         
         # Create directories if they don't exist
-        os.makedirs(storage_data_path, exist_ok=True)
-        os.makedirs(hot_storage_path, exist_ok=True)
-        os.makedirs(cold_storage_path, exist_ok=True)
-        os.makedirs(archive_storage_path, exist_ok=True)
+        for path in (storage_data_path, hot_storage_path, cold_storage_path, archive_storage_path):
+            os.makedirs(path, exist_ok=True)
+        
+        # Claim the storage data path before reading its access tracking
+        self._storage_data_lock = self._lock_storage_data_path()
         
         # Initialize access tracking
         self.access_tracking_path = os.path.join(storage_data_path, "access_tracking.json")
+        self.access_log_path = os.path.join(storage_data_path, "access_tracking.log")
+        self._access_pattern_cache: Dict[str, Tuple[str, float]] = {}
+        self._access_lock = threading.Lock()
+        self._dirty_count = 0
         self._init_access_tracking()
+        self._access_log = open(self.access_log_path, "ab", buffering=0)
+        atexit.register(self.flush_access_tracking)
+    
+    def _lock_storage_data_path(self):
+        """Take an exclusive lock on the storage data path for this instance.
+        
+        The instance stays registered for atexit, so the lock is held until
+        the process exits. It is not enforced on platforms without fcntl.
+        
+        Returns:
+            Open lock file holding the lock
+            
+        Raises:
+            RuntimeError: If another instance holds the lock
+        """
+        lock_file = open(os.path.join(self.storage_data_path, "storage_tiering.lock"), "wb")
+        if fcntl is not None:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock_file.close()
+                raise RuntimeError(
+                    f"Storage data path {self.storage_data_path} is in use by another storage tiering instance"
+                )
+        return lock_file
     
     def optimize_storage(self) -> Dict[str, Dict]:
         """Optimize storage for all models.
@@ -62,34 +167,58 @@ class StorageTiering:
         
         # Get all models
         models = self.model_repository.list_models()
+        if not models:
+            return {}
         
-        # Optimize storage for each model
+        # Optimize storage for each model concurrently, since each model's
+        # optimization mostly waits on metadata reads and file moves
         results = {}
-        for model in models:
+        max_workers = self.max_workers or min(MAX_STORAGE_WORKERS, len(models))
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="storage-tiering") as executor:
+            for model_results in executor.map(self._optimize_model_and_variants_storage, models):
+                results.update(model_results)
+        
+        return results
+    
+    def _optimize_model_and_variants_storage(self, model: Model) -> Dict[str, Dict]:
+        """Optimize storage for a model and its optimized versions.
+        
+        Args:
+            model: Model to optimize
+            
+        Returns:
+            Dictionary mapping model keys to optimization results
+        """
+        # The listed models are passed on, so models whose pattern still
+        # matches their tier are checked without reading their metadata again
+        results = {}
+        try:
+            result = self.optimize_model_storage(model.id, model=model)
+            results[model.id] = result
+        except Exception as e:
+            logger.error(f"Error optimizing storage for model {model.id}: {e}")
+            results[model.id] = {"error": str(e)}
+        
+        # Also optimize storage for optimized versions of the model
+        optimized_models = self.model_repository.list_optimized_models(model)
+        for optimized_model in optimized_models:
             try:
-                result = self.optimize_model_storage(model.id)
-                results[model.id] = result
+                result = self.optimize_optimized_model_storage(
+                    optimized_model.id, model, optimized_model=optimized_model
+                )
+                results[f"optimized_{optimized_model.id}"] = result
             except Exception as e:
-                logger.error(f"Error optimizing storage for model {model.id}: {e}")
-                results[model.id] = {"error": str(e)}
-            
-            # Also optimize storage for optimized versions of the model
-            optimized_models = self.model_repository.list_optimized_models(model)
-            for optimized_model in optimized_models:
-                try:
-                    result = self.optimize_optimized_model_storage(optimized_model.id, model)
-                    results[f"optimized_{optimized_model.id}"] = result
-                except Exception as e:
-                    logger.error(f"Error optimizing storage for optimized model {optimized_model.id}: {e}")
-                    results[f"optimized_{optimized_model.id}"] = {"error": str(e)}
+                logger.error(f"Error optimizing storage for optimized model {optimized_model.id}: {e}")
+                results[f"optimized_{optimized_model.id}"] = {"error": str(e)}
         
         return results
     
-    def optimize_model_storage(self, model_id: str) -> Dict:
+    def optimize_model_storage(self, model_id: str, *, model: Optional[Model] = None) -> Dict:
         """Optimize storage for a model.
         
         Args:
             model_id: ID of the model to optimize
+            model: The model, if already loaded
             
         Returns:
             Optimization results
@@ -97,7 +226,8 @@ class StorageTiering:
         logger.info(f"Optimizing storage for model {model_id}")
         
         # Get model
-        model = self.model_repository.get_model(model_id)
+        if model is None:
+            model = self.model_repository.get_model(model_id)
         if not model:
             raise ValueError(f"Model {model_id} not found")
         
@@ -131,12 +261,19 @@ class StorageTiering:
             "new_storage_path": new_storage_path,
         }
     
-    def optimize_optimized_model_storage(self, optimized_model_id: str, original_model: Model) -> Dict:
+    def optimize_optimized_model_storage(
+        self,
+        optimized_model_id: str,
+        original_model: Model,
+        *,
+        optimized_model: Optional[OptimizedModel] = None,
+    ) -> Dict:
         """Optimize storage for an optimized model.
         
         Args:
             optimized_model_id: ID of the optimized model to optimize
             original_model: Original model
+            optimized_model: The optimized model, if already loaded
             
         Returns:
             Optimization results
@@ -144,7 +281,8 @@ class StorageTiering:
         logger.info(f"Optimizing storage for optimized model {optimized_model_id}")
         
         # Get optimized model
-        optimized_model = self.model_repository.get_optimized_model(optimized_model_id, original_model)
+        if optimized_model is None:
+            optimized_model = self.model_repository.get_optimized_model(optimized_model_id, original_model)
         if not optimized_model:
             raise ValueError(f"Optimized model {optimized_model_id} not found")
         
@@ -185,46 +323,129 @@ class StorageTiering:
             model_id: ID of the accessed model
             is_optimized: Whether the model is an optimized model
         """
-        # Load access tracking data
-        access_data = self._load_access_tracking()
-        
         # Get model key
         model_key = f"optimized_{model_id}" if is_optimized else model_id
         
+        now = int(time.time())
+        
+        with self._access_lock:
+            # Append the access to the log instead of rewriting the whole
+            # access tracking file
+            self._access_log.write(f"{model_key}\t{now}\n".encode())
+            self._apply_model_access(self._load_access_tracking(), model_key, now)
+            
+            # Compact the log once enough accesses have accumulated
+            self._dirty_count += 1
+            if self._dirty_count >= ACCESS_COMPACTION_THRESHOLD:
+                self._compact_access_tracking()
+            
+            # The access may make the model's pattern hotter
+            self._access_pattern_cache.pop(model_key, None)
+    
+    def flush_access_tracking(self) -> None:
+        """Compact logged accesses into the access tracking file."""
+        with self._access_lock:
+            if self._dirty_count:
+                self._compact_access_tracking()
+    
+    def _apply_model_access(self, access_data: Dict, model_key: str, access_time: int) -> None:
+        """Update a model's access tracking data with one access.
+        
+        Args:
+            access_data: Access tracking data to update
+            model_key: Key of the accessed model
+            access_time: UNIX timestamp of the access
+        """
         # Initialize model access data if not exists
         if model_key not in access_data:
             access_data[model_key] = {
                 "total_accesses": 0,
                 "last_access": None,
-                "access_history": [],
+                "recent_accesses": 0.0,
             }
         
         # Update access data
-        now = datetime.datetime.utcnow().isoformat()
-        access_data[model_key]["total_accesses"] += 1
-        access_data[model_key]["last_access"] = now
-        access_data[model_key]["access_history"].append(now)
-        
-        # Trim access history to last 100 accesses
-        if len(access_data[model_key]["access_history"]) > 100:
-            access_data[model_key]["access_history"] = access_data[model_key]["access_history"][-100:]
+        model_access = access_data[model_key]
+        if model_access["last_access"] is not None:
+            recent_accesses = _decay(model_access["recent_accesses"], access_time - model_access["last_access"])
+        else:
+            recent_accesses = 0.0
+        model_access["total_accesses"] += 1
+        model_access["last_access"] = access_time
+        model_access["recent_accesses"] = recent_accesses + 1
+    
+    def _compact_access_tracking(self) -> None:
+        """Save access tracking data and empty the access log.
         
-        # Save access tracking data
-        self._save_access_tracking(access_data)
+        Must be called with the access lock held.
+        """
+        self._save_access_tracking(self._access_data)
+        self._access_log.truncate(0)
+        self._dirty_count = 0
     
     def _init_access_tracking(self) -> None:
         """Initialize access tracking data."""
         if not os.path.exists(self.access_tracking_path):
             self._save_access_tracking({})
+        
+        self._access_data = self._read_access_tracking()
+        self._dirty_count = self._replay_access_log(self._access_data)
+    
+    def _replay_access_log(self, access_data: Dict) -> int:
+        """Apply accesses logged since the access tracking file was last saved.
+        
+        Args:
+            access_data: Access tracking data read from disk
+            
+        Returns:
+            Number of accesses applied
+        """
+        if not os.path.exists(self.access_log_path):
+            return 0
+        
+        # The last element is empty unless a crash left the final line
+        # incomplete, and is skipped either way
+        with open(self.access_log_path, "rb") as f:
+            lines = f.read().decode().split("\n")[:-1]
+        
+        for line in lines:
+            model_key, _, access_time = line.rpartition("\t")
+            self._apply_model_access(access_data, model_key, int(access_time))
+        
+        return len(lines)
     
     def _load_access_tracking(self) -> Dict:
         """Load access tracking data.
         
+        Returns:
+            Access tracking data, shared and modified in place under the access lock
+        """
+        return self._access_data
+    
+    def _read_access_tracking(self) -> Dict:
+        """Read access tracking data from disk.
+        
         Returns:
             Access tracking data
         """
-        with open(self.access_tracking_path, "r") as f:
-            return json.load(f)
+        with open(self.access_tracking_path, "rb") as f:
+            data = f.read()
+        access_data = orjson.loads(data) if orjson is not None else json.loads(data)
+        
+        # Convert entries still holding an access history into a decayed
+        # recent access count
+        for model_access in access_data.values():
+            if "access_history" in model_access:
+                access_history = [_to_timestamp(t) for t in model_access.pop("access_history")]
+                recent_accesses = 0.0
+                if model_access["last_access"] is not None:
+                    model_access["last_access"] = _to_timestamp(model_access["last_access"])
+                    recent_accesses = sum(
+                        _decay(1.0, model_access["last_access"] - access_time) for access_time in access_history
+                    )
+                model_access["recent_accesses"] = recent_accesses
+        
+        return access_data
     
     def _save_access_tracking(self, access_data: Dict) -> None:
         """Save access tracking data.
@@ -232,12 +453,42 @@ class StorageTiering:
         Args:
             access_data: Access tracking data
         """
-        with open(self.access_tracking_path, "w") as f:
-            json.dump(access_data, f, indent=2)
+        if orjson is not None:
+            data = orjson.dumps(access_data)
+        else:
+            data = json.dumps(access_data).encode()
+        
+        # Write to a temporary file and rename it over the old one, so a crash
+        # never leaves a partially written file behind
+        tmp_path = f"{self.access_tracking_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self.access_tracking_path)
     
     def _get_access_pattern(self, model_key: str) -> str:
         """Get access pattern for a model.
         
+        Args:
+            model_key: Model key (model ID or "optimized_" + optimized model ID)
+            
+        Returns:
+            Access pattern: "frequent", "infrequent", or "rare"
+        """
+        cached = self._access_pattern_cache.get(model_key)
+        if cached is not None and cached[1] > time.monotonic():
+            return cached[0]
+        
+        with self._access_lock:
+            access_pattern = self._compute_access_pattern(model_key)
+        self._access_pattern_cache[model_key] = (
+            access_pattern,
+            time.monotonic() + ACCESS_PATTERN_TTLS[access_pattern],
+        )
+        return access_pattern
+    
+    def _compute_access_pattern(self, model_key: str) -> str:
+        """Compute access pattern for a model from its access tracking data.
+        
         Args:
             model_key: Model key (model ID or "optimized_" + optimized model ID)
             
@@ -259,33 +510,25 @@ class StorageTiering:
             return "rare"
         
         # Check last access time
-        last_access = datetime.datetime.fromisoformat(model_access["last_access"])
-        now = datetime.datetime.utcnow()
-        days_since_last_access = (now - last_access).days
+        now = int(time.time())
+        since_last_access = now - model_access["last_access"]
         
         # If not accessed in the last 30 days, consider rare
-        if days_since_last_access > 30:
+        if since_last_access > RARE_AFTER:
             return "rare"
         
         # If not accessed in the last 7 days, consider infrequent
-        if days_since_last_access > 7:
+        if since_last_access > INFREQUENT_AFTER:
             return "infrequent"
         
-        # Check access frequency
-        access_history = model_access["access_history"]
-        
         # If less than 5 accesses, consider infrequent
-        if len(access_history) < 5:
+        if model_access["total_accesses"] < 5:
             return "infrequent"
         
-        # If more than 10 accesses in the last 7 days, consider frequent
-        recent_accesses = 0
-        for access_time in access_history:
-            access_datetime = datetime.datetime.fromisoformat(access_time)
-            if (now - access_datetime).days <= 7:
-                recent_accesses += 1
+        # If accessed about 10 times or more in the last 7 days, consider frequent
+        recent_accesses = _decay(model_access["recent_accesses"], since_last_access)
         
-        if recent_accesses >= 10:
+        if recent_accesses >= FREQUENT_RECENT_ACCESSES:
             return "frequent"
         
         # Default to infrequent
@@ -300,6 +543,11 @@ class StorageTiering:
         Returns:
             Storage tier: "hot", "cold", or "archive"
         """
+        # Models moved between tiers sit directly in the tier directory
+        tier = self._tier_by_dir.get(os.path.dirname(storage_path))
+        if tier is not None:
+            return tier
+        
         if storage_path.startswith(self.hot_storage_path):
             return "hot"
         elif storage_path.startswith(self.cold_storage_path):
@@ -348,9 +596,16 @@ class StorageTiering:
         filename = os.path.basename(storage_path)
         new_storage_path = os.path.join(target_dir, filename)
         
-        # Move file
-        shutil.copy2(storage_path, new_storage_path)
-        os.remove(storage_path)
+        # Move file. Tiers on the same filesystem only need a rename; copy the
+        # data, with its permissions and timestamps, only when the target tier
+        # is on another filesystem.
+        try:
+            os.rename(storage_path, new_storage_path)
+        except OSError as e:
+            if e.errno != errno.EXDEV:
+                raise
+            self.model_repository._fastcopy(storage_path, new_storage_path)
+            os.remove(storage_path)
         
         logger.info(f"Moved model from {storage_path} to {new_storage_path}")
         
@@ -6,6 +6,7 @@ This module provides a CLI for interacting with the platform.
 
 import argparse
 import datetime
+import functools
 import json
 import logging
 import os
@@ -13,18 +14,132 @@ import sys
 import time
 from typing import Dict, List, Optional
 
-import requests
-import tabulate
-import yaml
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-)
+# requests, tabulate and yaml are imported inside the command handlers that
+# use them so that `--help` and argument errors don't pay their import cost.
 
 logger = logging.getLogger(__name__)
 
+# Argument choices
+TABLE_FORMATS = ("plain", "fancy")
+OPTIMIZATION_METHODS = ("quantization", "pruning", "distillation")
+MODEL_TYPES = ("original", "optimized")
+DEPLOYMENT_TYPES = ("kubernetes", "serverless")
+
+# Local response cache for idempotent GET endpoints
+CACHE_PATH = os.path.expanduser("~/.cache/aideploy/http_cache")
+
+# Cache lifetimes in seconds, keyed by API path prefix. Deployment endpoints
+# are deliberately absent since their status is polled.
+CACHE_EXPIRE_AFTER = {
+    "/models": 60,
+    "/analytics/cost": 60,
+    "/analytics/performance": 60,
+    "/analytics/suggestions": 600,
+}
+
+# Path prefixes never cached even though they fall under CACHE_EXPIRE_AFTER.
+# requests-cache matches URL patterns by prefix, so these keep single models
+# and their optimized versions out of the cache and only the list is cached.
+CACHE_EXCLUDE = ("/models/",)
+
+# Subcommands that change server state, after which cached responses are
+# dropped so later commands don't show stale models
+MUTATING_SUBCOMMANDS = {
+    "models": {"upload", "delete", "optimize"},
+    "deployments": {"create", "update", "delete", "hibernate", "activate"},
+}
+
+
+@functools.lru_cache(maxsize=32)
+def _parse_metadata(metadata: str) -> Dict:
+    """Parse a --metadata JSON string, caching the result per process.
+    
+    Args:
+        metadata: Metadata as a JSON object string
+        
+    Returns:
+        Parsed metadata. The dictionary is shared between callers and must
+        not be mutated.
+        
+    Raises:
+        ValueError: If the metadata is not a valid JSON object
+    """
+    try:
+        import orjson
+        
+        parsed = orjson.loads(metadata)
+    except ImportError:
+        parsed = json.loads(metadata)
+    
+    if not isinstance(parsed, dict):
+        raise ValueError("Metadata must be a JSON object")
+    
+    return parsed
+
+
+# Global options that take a value, which _peek_command must skip
+GLOBAL_VALUE_OPTIONS = ("--format",)
+
+
+def _peek_command(argv: List[str]) -> Optional[str]:
+    """Find the command in an argument list without parsing it.
+    
+    Args:
+        argv: Command-line arguments
+        
+    Returns:
+        The first argument that is neither a global option nor its value, or
+        None if there is none
+    """
+    args = iter(argv)
+    for arg in args:
+        if arg in GLOBAL_VALUE_OPTIONS:
+            next(args, None)
+        elif not arg.startswith("-"):
+            return arg
+    return None
+
+
+def _configure_logging() -> None:
+    """Configure logging for the CLI.
+    
+    Called once arguments have been parsed, so --help and usage errors exit
+    without installing a handler. The level defaults to INFO and can be
+    overridden with the AIDEPLOY_LOG_LEVEL environment variable.
+    """
+    logging.basicConfig(
+        level=os.environ.get("AIDEPLOY_LOG_LEVEL", "INFO").upper(),
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+
+
+def _format_table(headers: List[str], rows: List[List]) -> str:
+    """Format rows as a plain-text table with left-aligned columns.
+    
+    Args:
+        headers: Column headers
+        rows: Table rows
+        
+    Returns:
+        Formatted table
+    """
+    cells = [[str(cell) for cell in row] for row in rows]
+    widths = [len(header) for header in headers]
+    for row in cells:
+        for i, cell in enumerate(row):
+            if len(cell) > widths[i]:
+                widths[i] = len(cell)
+    
+    lines = [
+        "  ".join(header.ljust(width) for header, width in zip(headers, widths)).rstrip(),
+        "  ".join("-" * width for width in widths),
+    ]
+    lines.extend(
+        "  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip()
+        for row in cells
+    )
+    return "\n".join(lines)
+
 
 class AiDeployPlatformCli:
     """Command-line interface for the AI model deployment platform."""
@@ -36,9 +151,19 @@ class AiDeployPlatformCli:
             api_url: URL of the API server
         """
         self.api_url = api_url
+        self.use_cache = True
+        self.table_format = "plain"
+        self._sessions = {}
     
-    def run(self) -> None:
-        """Run the CLI."""
+    def run(self, argv: Optional[List[str]] = None) -> None:
+        """Run the CLI.
+        
+        Args:
+            argv: Command-line arguments (defaults to sys.argv[1:])
+        """
+        if argv is None:
+            argv = sys.argv[1:]
+        
         parser = argparse.ArgumentParser(
             description="AI Deploy Platform CLI",
             formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -79,12 +204,151 @@ Examples:
   
   # Get optimization suggestions
   aideploy analytics suggestions
+  
+  # Get cost, performance and suggestions together
+  aideploy analytics dashboard
+  
+  # Run commands from a file, one per line, in a single process
+  aideploy batch commands.txt
             """,
         )
         
+        parser.add_argument(
+            "--no-cache", action="store_true", help="Bypass the local response cache"
+        )
+        parser.add_argument(
+            "--format",
+            default="plain",
+            choices=TABLE_FORMATS,
+            help="Table output format",
+        )
+        
         subparsers = parser.add_subparsers(dest="command", help="Command")
         
-        # Models command
+        # Only build the subcommand tree that is about to be dispatched; help
+        # and unknown commands fall back to the full tree.
+        builders = {
+            "models": self._build_models_parser,
+            "deployments": self._build_deployments_parser,
+            "analytics": self._build_analytics_parser,
+            "batch": self._build_batch_parser,
+        }
+        command = _peek_command(argv)
+        if command in builders:
+            builders[command](subparsers)
+        else:
+            for build_parser in builders.values():
+                build_parser(subparsers)
+        
+        # Parse arguments
+        args = parser.parse_args(argv)
+        _configure_logging()
+        self.use_cache = not args.no_cache
+        self.table_format = args.format
+        
+        # Parse metadata once, rejecting malformed metadata before any request
+        # reaches the server. Handlers receive the parsed dictionary.
+        if getattr(args, "metadata", None):
+            try:
+                args.metadata = _parse_metadata(args.metadata)
+            except ValueError as e:
+                parser.error(f"Invalid --metadata: {e}")
+        
+        # Execute command
+        if args.command == "models":
+            if args.subcommand == "list":
+                self._models_list()
+            elif args.subcommand == "get":
+                self._models_get(args.id)
+            elif args.subcommand == "upload":
+                self._models_upload(
+                    args.name, args.framework, args.version, args.file, args.metadata
+                )
+            elif args.subcommand == "delete":
+                self._models_delete(args.id)
+            elif args.subcommand == "optimize":
+                self._models_optimize(
+                    args.id, args.method, args.target_size, args.target_latency, args.metadata
+                )
+            elif args.subcommand == "optimized":
+                self._models_optimized(args.id)
+            else:
+                parser.print_help()
+        elif args.command == "deployments":
+            if args.subcommand == "list":
+                self._deployments_list()
+            elif args.subcommand == "get":
+                self._deployments_get(args.id)
+            elif args.subcommand == "create":
+                self._deployments_create(
+                    args.name,
+                    args.model_id,
+                    args.model_type,
+                    args.deployment_type,
+                    args.cpu,
+                    args.memory,
+                    args.gpu,
+                    args.timeout,
+                    args.min_instances,
+                    args.max_instances,
+                    args.target_cpu,
+                    args.use_spot,
+                    args.enable_hibernation,
+                    args.hibernation_timeout,
+                    args.enable_multi_cloud,
+                    args.metadata,
+                )
+            elif args.subcommand == "update":
+                self._deployments_update(
+                    args.id,
+                    args.cpu,
+                    args.memory,
+                    args.gpu,
+                    args.timeout,
+                    args.min_instances,
+                    args.max_instances,
+                    args.target_cpu,
+                    args.use_spot,
+                    args.enable_hibernation,
+                    args.hibernation_timeout,
+                    args.enable_multi_cloud,
+                    args.metadata,
+                )
+            elif args.subcommand == "delete":
+                self._deployments_delete(args.id)
+            elif args.subcommand == "hibernate":
+                self._deployments_hibernate(args.id)
+            elif args.subcommand == "activate":
+                self._deployments_activate(args.id)
+            else:
+                parser.print_help()
+        elif args.command == "analytics":
+            if args.subcommand == "cost":
+                self._analytics_cost(args.start, args.end)
+            elif args.subcommand == "performance":
+                self._analytics_performance(args.start, args.end)
+            elif args.subcommand == "forecast":
+                self._analytics_forecast(args.days, args.start, args.end)
+            elif args.subcommand == "suggestions":
+                self._analytics_suggestions()
+            elif args.subcommand == "dashboard":
+                self._analytics_dashboard(args.start, args.end)
+            else:
+                parser.print_help()
+        elif args.command == "batch":
+            self._batch(args.file)
+        else:
+            parser.print_help()
+        
+        if getattr(args, "subcommand", None) in MUTATING_SUBCOMMANDS.get(args.command, ()):
+            self._clear_response_cache()
+    
+    def _build_models_parser(self, subparsers: argparse._SubParsersAction) -> None:
+        """Build the argument parser for the models command.
+        
+        Args:
+            subparsers: Top-level subparsers to add the command to
+        """
         models_parser = subparsers.add_parser("models", help="Manage models")
         models_subparsers = models_parser.add_subparsers(dest="subcommand", help="Subcommand")
         
@@ -113,7 +377,7 @@ Examples:
         models_optimize_parser.add_argument(
             "--method",
             required=True,
-            choices=["quantization", "pruning", "distillation"],
+            choices=OPTIMIZATION_METHODS,
             help="Optimization method",
         )
         models_optimize_parser.add_argument("--target-size", help="Target model size")
@@ -127,8 +391,13 @@ Examples:
             "optimized", help="List optimized versions of a model"
         )
         models_optimized_parser.add_argument("--id", required=True, help="Model ID")
+    
+    def _build_deployments_parser(self, subparsers: argparse._SubParsersAction) -> None:
+        """Build the argument parser for the deployments command.
         
-        # Deployments command
+        Args:
+            subparsers: Top-level subparsers to add the command to
+        """
         deployments_parser = subparsers.add_parser("deployments", help="Manage deployments")
         deployments_subparsers = deployments_parser.add_subparsers(
             dest="subcommand", help="Subcommand"
@@ -152,13 +421,13 @@ Examples:
         deployments_create_parser.add_argument(
             "--model-type",
             default="original",
-            choices=["original", "optimized"],
+            choices=MODEL_TYPES,
             help="Model type",
         )
         deployments_create_parser.add_argument(
             "--deployment-type",
             default="serverless",
-            choices=["kubernetes", "serverless"],
+            choices=DEPLOYMENT_TYPES,
             help="Deployment type",
         )
         deployments_create_parser.add_argument(
@@ -261,8 +530,13 @@ Examples:
             "activate", help="Activate a hibernated deployment"
         )
         deployments_activate_parser.add_argument("--id", required=True, help="Deployment ID")
+    
+    def _build_analytics_parser(self, subparsers: argparse._SubParsersAction) -> None:
+        """Build the argument parser for the analytics command.
         
-        # Analytics command
+        Args:
+            subparsers: Top-level subparsers to add the command to
+        """
         analytics_parser = subparsers.add_parser("analytics", help="Analytics and monitoring")
         analytics_subparsers = analytics_parser.add_subparsers(dest="subcommand", help="Subcommand")
         
@@ -293,98 +567,267 @@ Examples:
             "suggestions", help="Get optimization suggestions"
         )
         
-        # Parse arguments
-        args = parser.parse_args()
+        # Analytics dashboard command
+        analytics_dashboard_parser = analytics_subparsers.add_parser(
+            "dashboard", help="Get cost, performance and suggestions together"
+        )
+        analytics_dashboard_parser.add_argument("--start", help="Start time (ISO format)")
+        analytics_dashboard_parser.add_argument("--end", help="End time (ISO format)")
+    
+    def _build_batch_parser(self, subparsers: argparse._SubParsersAction) -> None:
+        """Build the argument parser for the batch command.
         
-        # Execute command
-        if args.command == "models":
-            if args.subcommand == "list":
-                self._models_list()
-            elif args.subcommand == "get":
-                self._models_get(args.id)
-            elif args.subcommand == "upload":
-                self._models_upload(
-                    args.name, args.framework, args.version, args.file, args.metadata
-                )
-            elif args.subcommand == "delete":
-                self._models_delete(args.id)
-            elif args.subcommand == "optimize":
-                self._models_optimize(
-                    args.id, args.method, args.target_size, args.target_latency, args.metadata
-                )
-            elif args.subcommand == "optimized":
-                self._models_optimized(args.id)
-            else:
-                parser.print_help()
-        elif args.command == "deployments":
-            if args.subcommand == "list":
-                self._deployments_list()
-            elif args.subcommand == "get":
-                self._deployments_get(args.id)
-            elif args.subcommand == "create":
-                self._deployments_create(
-                    args.name,
-                    args.model_id,
-                    args.model_type,
-                    args.deployment_type,
-                    args.cpu,
-                    args.memory,
-                    args.gpu,
-                    args.timeout,
-                    args.min_instances,
-                    args.max_instances,
-                    args.target_cpu,
-                    args.use_spot,
-                    args.enable_hibernation,
-                    args.hibernation_timeout,
-                    args.enable_multi_cloud,
-                    args.metadata,
-                )
-            elif args.subcommand == "update":
-                self._deployments_update(
-                    args.id,
-                    args.cpu,
-                    args.memory,
-                    args.gpu,
-                    args.timeout,
-                    args.min_instances,
-                    args.max_instances,
-                    args.target_cpu,
-                    args.use_spot,
-                    args.enable_hibernation,
-                    args.hibernation_timeout,
-                    args.enable_multi_cloud,
-                    args.metadata,
-                )
-            elif args.subcommand == "delete":
-                self._deployments_delete(args.id)
-            elif args.subcommand == "hibernate":
-                self._deployments_hibernate(args.id)
-            elif args.subcommand == "activate":
-                self._deployments_activate(args.id)
-            else:
-                parser.print_help()
-        elif args.command == "analytics":
-            if args.subcommand == "cost":
-                self._analytics_cost(args.start, args.end)
-            elif args.subcommand == "performance":
-                self._analytics_performance(args.start, args.end)
-            elif args.subcommand == "forecast":
-                self._analytics_forecast(args.days, args.start, args.end)
-            elif args.subcommand == "suggestions":
-                self._analytics_suggestions()
-            else:
-                parser.print_help()
+        Args:
+            subparsers: Top-level subparsers to add the command to
+        """
+        batch_parser = subparsers.add_parser(
+            "batch", help="Run commands from a file in a single process"
+        )
+        batch_parser.add_argument("file", help="File with one command per line")
+    
+    def _get_session(self):
+        """Get the HTTP session shared by all commands, creating it on first use.
+        
+        Commands run with and without --no-cache get separate sessions, so a
+        batch line that bypasses the cache never goes through the cached one.
+        
+        GET responses from the endpoints in CACHE_EXPIRE_AFTER, minus those
+        in CACHE_EXCLUDE, are cached on disk when requests-cache is installed
+        and caching isn't disabled.
+        Server Cache-Control headers take precedence over those lifetimes,
+        and expired entries with an ETag are revalidated with If-None-Match
+        so an unchanged list comes back as a bodiless 304.
+        
+        Returns:
+            requests.Session with a keep-alive connection pool
+        """
+        session = self._sessions.get(self.use_cache)
+        if session is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            
+            if self.use_cache:
+                try:
+                    import requests_cache
+                    
+                    os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+                    session = requests_cache.CachedSession(
+                        cache_name=CACHE_PATH,
+                        backend="sqlite",
+                        cache_control=True,
+                        expire_after=requests_cache.DO_NOT_CACHE,
+                        # The first matching pattern wins, so the exclusions
+                        # go ahead of the lifetimes
+                        urls_expire_after={
+                            **{f"{self.api_url}{path}": requests_cache.DO_NOT_CACHE for path in CACHE_EXCLUDE},
+                            **{
+                                f"{self.api_url}{path}": expire_after
+                                for path, expire_after in CACHE_EXPIRE_AFTER.items()
+                            },
+                        },
+                    )
+                except ImportError:
+                    logger.debug("requests-cache not installed, response caching disabled")
+            
+            if session is None:
+                session = requests.Session()
+            
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            self._sessions[self.use_cache] = session
+        
+        return session
+    
+    def _clear_response_cache(self) -> None:
+        """Drop all locally cached responses, including those of other processes."""
+        if not os.path.exists(f"{CACHE_PATH}.sqlite"):
+            return
+        
+        try:
+            import requests_cache
+        except ImportError:
+            return
+        
+        session = self._sessions.get(True)
+        if isinstance(session, requests_cache.CachedSession):
+            session.cache.clear()
         else:
-            parser.print_help()
+            requests_cache.SQLiteCache(CACHE_PATH).clear()
+    
+    def _print_table(self, headers: List[str], data: List[List]) -> None:
+        """Print rows as a table in the selected output format.
+        
+        Args:
+            headers: Column headers
+            data: Table rows
+        """
+        if self.table_format == "fancy":
+            import tabulate
+            
+            print(tabulate.tabulate(data, headers=headers, tablefmt="fancy_grid"))
+        else:
+            print(_format_table(headers, data))
+    
+    def _json(self, response):
+        """Decode a JSON response body, using orjson when it is installed.
+        
+        Args:
+            response: Response from the API server
+            
+        Returns:
+            Decoded JSON payload
+        """
+        try:
+            import orjson
+        except ImportError:
+            return response.json()
+        
+        return orjson.loads(response.content)
+    
+    def _post_file(self, url: str, file_path: str, data: Dict):
+        """POST a file as multipart form data without reading it into memory.
+        
+        Args:
+            url: URL to post to
+            file_path: Path to the file to upload
+            data: Additional form fields
+            
+        Returns:
+            Response from the API server
+        """
+        with open(file_path, "rb") as f:
+            file_field = (os.path.basename(file_path), f, "application/octet-stream")
+            
+            try:
+                from requests_toolbelt import MultipartEncoder
+            except ImportError:
+                # Without requests-toolbelt the multipart body is built in memory
+                return self._get_session().post(url, files={"file": file_field}, data=data)
+            
+            encoder = MultipartEncoder(fields={**data, "file": file_field})
+            return self._get_session().post(
+                url, data=encoder, headers={"Content-Type": encoder.content_type}
+            )
+    
+    def _analytics_dashboard(
+        self, start_time: Optional[str] = None, end_time: Optional[str] = None
+    ) -> None:
+        """Get cost, performance and suggestions in one view.
+        
+        The three analytics requests are independent, so they are issued
+        concurrently over the shared session.
+        
+        Args:
+            start_time: Start time for analysis (ISO format)
+            end_time: End time for analysis (ISO format)
+        """
+        import requests
+        from concurrent.futures import ThreadPoolExecutor
+        
+        session = self._get_session()
+        time_range = {"start_time": start_time, "end_time": end_time}
+        requests_by_section = {
+            "cost": ("/analytics/cost", time_range),
+            "performance": ("/analytics/performance", time_range),
+            "suggestions": ("/analytics/suggestions", None),
+        }
+        
+        def fetch(path: str, params: Optional[Dict]) -> Dict:
+            response = session.get(f"{self.api_url}{path}", params=params)
+            response.raise_for_status()
+            return self._json(response)
+        
+        try:
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                futures = {
+                    section: executor.submit(fetch, path, params)
+                    for section, (path, params) in requests_by_section.items()
+                }
+                results = {section: future.result() for section, future in futures.items()}
+            
+            cost = results["cost"]
+            performance = results["performance"]
+            suggestions = results["suggestions"].get("suggestions_by_deployment", {})
+            
+            data = [
+                ["Total Cost", f"${cost.get('total_cost', 0):.2f}"],
+                ["Total Requests", performance.get("total_requests", 0)],
+                ["Avg Latency (ms)", f"{performance.get('avg_latency', 0):.2f}"],
+                ["Error Rate (%)", f"{performance.get('error_rate', 0):.2f}"],
+                [
+                    "Suggestions",
+                    sum(len(entry["suggestions"]) for entry in suggestions.values()),
+                ],
+            ]
+            self._print_table(["Metric", "Value"], data)
+        
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Failed to get analytics dashboard: {e}")
+            sys.exit(1)
+    
+    def _batch(self, file_path: str) -> None:
+        """Run CLI commands from a file, one per line.
+        
+        All commands run in this process over the shared session, so
+        interpreter startup and connection setup are paid once. Blank lines
+        and lines starting with "#" are skipped, and a failing command does
+        not stop the remaining ones. The batch invocation's global options
+        (--no-cache, --format) apply to every line unless the line sets its
+        own.
+        
+        Args:
+            file_path: Path to the file with one command per line
+        """
+        import shlex
+        
+        # run() resets the global options for each line, so pass the batch's
+        # own ahead of the line's arguments
+        global_argv = ["--format", self.table_format]
+        if not self.use_cache:
+            global_argv.append("--no-cache")
+        
+        failures = 0
+        with open(file_path, "r") as f:
+            for line_number, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                
+                try:
+                    argv = shlex.split(line)
+                    if argv[:1] == ["aideploy"]:
+                        argv = argv[1:]
+                    
+                    if _peek_command(argv) == "batch":
+                        logger.error(f"Line {line_number}: nested batch commands are not supported")
+                        failures += 1
+                        continue
+                    
+                    self.run(global_argv + argv)
+                except SystemExit as e:
+                    if e.code:
+                        logger.error(f"Line {line_number}: command failed: {line}")
+                        failures += 1
+                except Exception as e:
+                    logger.error(f"Line {line_number}: command failed: {line}: {e}")
+                    failures += 1
+                
+                sys.stdout.flush()
+        
+        if failures:
+            logger.error(f"{failures} batch command(s) failed")
+            sys.exit(1)
     
     def _models_list(self) -> None:
         """List all models."""
+        import requests
+        
         try:
-            response = requests.get(f"{self.api_url}/models")
+            response = self._get_session().get(f"{self.api_url}/models")
             response.raise_for_status()
             
-            models = response.json()
+            models = self._json(response)
             
             if not models:
                 print("No models found.")
@@ -0,0 +1,9 @@
+"""
+Paths shared by the test model scripts, kept free of framework imports.
+"""
+
+import os
+
+# MNIST download cache shared by all test model scripts, so the dataset is
+# downloaded once regardless of the working directory
+DATA_ROOT = os.environ.get("MNIST_CACHE_DIR", "/home/ubuntu/ai-deploy-platform/test/data")
@@ -0,0 +1,121 @@
+"""
+Model and training code shared by the PyTorch and ONNX test model scripts.
+"""
+
+import sys
+import torch
+import torch.nn as nn
+import torch.optim as optim
+import torchvision
+
+from _paths import DATA_ROOT
+
+# Define a simple CNN model
+class SimpleCNN(nn.Module):
+    def __init__(self):
+        super(SimpleCNN, self).__init__()
+        self.conv1 = nn.Conv2d(1, 32, 3, 1)
+        self.conv2 = nn.Conv2d(32, 64, 3, 1)
+        self.dropout1 = nn.Dropout2d(0.25)
+        self.dropout2 = nn.Dropout2d(0.5)
+        self.fc1 = nn.Linear(9216, 128)
+        self.fc2 = nn.Linear(128, 10)
+
+    def forward(self, x):
+        x = self.conv1(x)
+        x = nn.functional.relu(x)
+        x = self.conv2(x)
+        x = nn.functional.relu(x)
+        x = nn.functional.max_pool2d(x, 2)
+        x = self.dropout1(x)
+        x = torch.flatten(x, 1)
+        x = self.fc1(x)
+        x = nn.functional.relu(x)
+        x = self.dropout2(x)
+        # Return logits: CrossEntropyLoss applies log_softmax itself
+        output = self.fc2(x)
+        return output
+
+# Load the normalized MNIST training images and their labels
+def load_mnist():
+    # Download training data
+    mnist = torchvision.datasets.MNIST(
+        root=DATA_ROOT,
+        train=True,
+        download=True
+    )
+
+    # Normalize the whole dataset once as a single tensor op instead of
+    # converting and normalizing every sample as it is loaded
+    images = mnist.data.float().div_(255.0).sub_(0.1307).div_(0.3081).unsqueeze(1)
+    return images, mnist.targets
+
+# Train a SimpleCNN on the first batches of MNIST
+def train_mnist(device, max_batches=300):
+    # Allow TF32 Tensor Core math for matmuls and convolutions on Ampere and
+    # newer GPUs
+    torch.backends.cuda.matmul.allow_tf32 = True
+    torch.backends.cudnn.allow_tf32 = True
+    torch.set_float32_matmul_precision("high")
+
+    images, targets = load_mnist()
+
+    # Move the whole dataset to the device once, channels-last (NHWC) like
+    # the model below, so each batch is just a slice of it
+    images = images.to(device, memory_format=torch.channels_last)
+    targets = targets.to(device)
+    batch_size = 64
+    num_batches = (len(images) + batch_size - 1) // batch_size
+
+    # Let cuDNN pick the fastest convolution algorithms; the input shape
+    # never changes, so they are benchmarked only once
+    torch.backends.cudnn.benchmark = True
+
+    # Create model
+    model = SimpleCNN().to(device)
+
+    # Store weights channels-last (NHWC) so convolutions run on cuDNN's NHWC
+    # Tensor Core kernels
+    model = model.to(memory_format=torch.channels_last)
+
+    # Train through a compiled wrapper that fuses the elementwise ops into
+    # the convolution and linear kernels; it shares the model's parameters,
+    # and the eager model is returned for export. The first batch pays the
+    # compilation cost. torch.compile only supports Python 3.11 from torch
+    # 2.1, so older versions train the eager model there.
+    if torch.__version__ >= "2.1" or sys.version_info < (3, 11):
+        compiled_model = torch.compile(model)
+    else:
+        compiled_model = model
+
+    # The fused Adam implementation updates all parameters in one kernel, but
+    # only supports CUDA tensors
+    optimizer = optim.Adam(model.parameters(), fused=(device.type == "cuda"))
+    criterion = nn.CrossEntropyLoss()
+
+    # Train in mixed precision on GPUs, scaling the loss so small FP16
+    # gradients don't underflow
+    use_amp = device.type == "cuda"
+    scaler = torch.cuda.amp.GradScaler(enabled=use_amp)
+
+    # Train for just one epoch for testing purposes
+    model.train()
+    for batch_idx in range(num_batches):
+        data = images[batch_idx * batch_size:(batch_idx + 1) * batch_size]
+        target = targets[batch_idx * batch_size:(batch_idx + 1) * batch_size]
+        optimizer.zero_grad(set_to_none=True)
+        with torch.autocast(device.type, enabled=use_amp):
+            output = compiled_model(data)
+            loss = criterion(output, target)
+        scaler.scale(loss).backward()
+        scaler.step(optimizer)
+        scaler.update()
+
+        if batch_idx % 100 == 0:
+            print(f'Batch {batch_idx}/{num_batches}, Loss: {loss.item():.4f}')
+
+        # Just train on a few batches for testing
+        if batch_idx >= max_batches:
+            break
+
+    return model
@@ -4,37 +4,66 @@ Test script for creating and testing an ONNX model for the AI model deployment p
 
 import os
 import torch
-import torch.nn as nn
-import torch.optim as optim
-import torchvision
-import torchvision.transforms as transforms
-import numpy as np
-
-# Define a simple CNN model
-class SimpleCNN(nn.Module):
-    def __init__(self):
-        super(SimpleCNN, self).__init__()
-        self.conv1 = nn.Conv2d(1, 32, 3, 1)
-        self.conv2 = nn.Conv2d(32, 64, 3, 1)
-        self.dropout1 = nn.Dropout2d(0.25)
-        self.dropout2 = nn.Dropout2d(0.5)
-        self.fc1 = nn.Linear(9216, 128)
-        self.fc2 = nn.Linear(128, 10)
-
-    def forward(self, x):
-        x = self.conv1(x)
-        x = nn.functional.relu(x)
-        x = self.conv2(x)
-        x = nn.functional.relu(x)
-        x = nn.functional.max_pool2d(x, 2)
-        x = self.dropout1(x)
-        x = torch.flatten(x, 1)
-        x = self.fc1(x)
-        x = nn.functional.relu(x)
-        x = self.dropout2(x)
-        x = self.fc2(x)
-        output = nn.functional.log_softmax(x, dim=1)
-        return output
+
+from _shared import SimpleCNN, load_mnist, train_mnist
+
+# Build a TensorRT engine from an ONNX model with INT8 calibration
+def build_tensorrt_engine(onnx_path, engine_path, calibration_batches=100, batch_size=64):
+    import tensorrt as trt
+
+    trt_logger = trt.Logger(trt.Logger.WARNING)
+    builder = trt.Builder(trt_logger)
+    network = builder.create_network(1 << int(trt.NetworkDefinitionCreationFlag.EXPLICIT_BATCH))
+    parser = trt.OnnxParser(network, trt_logger)
+    with open(onnx_path, 'rb') as f:
+        if not parser.parse(f.read()):
+            errors = [str(parser.get_error(i)) for i in range(parser.num_errors)]
+            raise RuntimeError(f"Failed to parse ONNX model: {errors}")
+
+    # Calibrate INT8 activation ranges on batches of MNIST training images,
+    # copied to the GPU one batch at a time
+    images, _ = load_mnist()
+    images = images[:calibration_batches * batch_size]
+
+    class MNISTCalibrator(trt.IInt8EntropyCalibrator2):
+        def __init__(self):
+            super().__init__()
+            self.batch_idx = 0
+            self.device_batch = None
+
+        def get_batch_size(self):
+            return batch_size
+
+        def get_batch(self, names):
+            start = self.batch_idx * batch_size
+            if start + batch_size > len(images):
+                return None
+            self.device_batch = images[start:start + batch_size].cuda().contiguous()
+            self.batch_idx += 1
+            return [self.device_batch.data_ptr()]
+
+        def read_calibration_cache(self):
+            return None
+
+        def write_calibration_cache(self, cache):
+            pass
+
+    # The model has a dynamic batch axis, so declare the batch sizes to
+    # build for; calibration runs at the full batch size
+    profile = builder.create_optimization_profile()
+    profile.set_shape('input', (1, 1, 28, 28), (batch_size, 1, 28, 28), (batch_size, 1, 28, 28))
+
+    config = builder.create_builder_config()
+    config.add_optimization_profile(profile)
+    config.set_calibration_profile(profile)
+    config.set_flag(trt.BuilderFlag.INT8)
+    config.int8_calibrator = MNISTCalibrator()
+
+    engine = builder.build_serialized_network(network, config)
+    if engine is None:
+        raise RuntimeError("Failed to build TensorRT engine")
+    with open(engine_path, 'wb') as f:
+        f.write(engine)
 
 # Create and train a simple model, then export to ONNX
 def create_and_export_onnx_model():
@@ -42,50 +71,26 @@ def create_and_export_onnx_model():
     device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
     print(f"Using device: {device}")
 
-    # Load MNIST dataset
-    transform = transforms.Compose([
-        transforms.ToTensor(),
-        transforms.Normalize((0.1307,), (0.3081,))
-    ])
-
-    # Download training data
-    train_dataset = torchvision.datasets.MNIST(
-        root='./data', 
-        train=True, 
-        download=True, 
-        transform=transform
-    )
-    train_loader = torch.utils.data.DataLoader(train_dataset, batch_size=64)
-
-    # Create model
-    model = SimpleCNN().to(device)
-    optimizer = optim.Adam(model.parameters())
-    criterion = nn.CrossEntropyLoss()
-
-    # Train for just one epoch for testing purposes
-    model.train()
-    for batch_idx, (data, target) in enumerate(train_loader):
-        data, target = data.to(device), target.to(device)
-        optimizer.zero_grad()
-        output = model(data)
-        loss = criterion(output, target)
-        loss.backward()
-        optimizer.step()
-        
-        if batch_idx % 100 == 0:
-            print(f'Batch {batch_idx}/{len(train_loader)}, Loss: {loss.item():.4f}')
-        
-        # Just train on a few batches for testing
-        if batch_idx >= 300:
-            break
+    # Reuse the weights trained by create_pytorch_model.py if it has already
+    # run, instead of downloading MNIST and training the same model again
+    trained_path = os.path.join('/home/ubuntu/ai-deploy-platform/test/models', 'mnist_cnn.pt')
+    if os.path.exists(trained_path):
+        print(f"Loading trained weights from {trained_path}")
+        model = SimpleCNN().to(device)
+        model.load_state_dict(torch.load(trained_path, map_location=device))
+    else:
+        model = train_mnist(device)
 
     # Save the PyTorch model
     model_path = os.path.join('/home/ubuntu/ai-deploy-platform/test/models', 'mnist_cnn_for_onnx.pt')
     torch.save(model.state_dict(), model_path)
     print(f"PyTorch model saved to {model_path}")
     
-    # Export the model to ONNX format
+    # Export the model to ONNX format. Dropout is a no-op in eval mode, so
+    # swap it out to keep Dropout nodes out of the exported graph.
     model.eval()
+    model.dropout1 = torch.nn.Identity()
+    model.dropout2 = torch.nn.Identity()
     dummy_input = torch.randn(1, 1, 28, 28, device=device)
     onnx_path = os.path.join('/home/ubuntu/ai-deploy-platform/test/models', 'mnist_cnn.onnx')
     
@@ -94,8 +99,10 @@ def create_and_export_onnx_model():
                       dummy_input,         # model input (or a tuple for multiple inputs)
                       onnx_path,           # where to save the model
                       export_params=True,  # store the trained parameter weights inside the model file
-                      opset_version=11,    # the ONNX version to export the model to
+                      opset_version=17,    # the ONNX version to export the model to
                       do_constant_folding=True,  # whether to execute constant folding for optimization
+                      training=torch.onnx.TrainingMode.EVAL,  # export the inference behaviour of every layer
+                      keep_initializers_as_inputs=False,  # keep the weights constants rather than graph inputs
                       input_names = ['input'],   # the model's input names
                       output_names = ['output'], # the model's output names
                       dynamic_axes={'input' : {0 : 'batch_size'},    # variable length axes
@@ -114,6 +121,60 @@ def create_and_export_onnx_model():
     except Exception as e:
         print(f"ONNX model verification failed: {e}")
     
+    # Run ONNX Runtime's graph optimizations once, offline, and save the
+    # optimized graph so it doesn't have to be optimized at load time
+    try:
+        import onnxruntime as ort
+        sess_options = ort.SessionOptions()
+        sess_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        sess_options.optimized_model_filepath = onnx_path.replace('.onnx', '_opt.onnx')
+        ort.InferenceSession(onnx_path, sess_options, providers=['CPUExecutionProvider'])
+        print(f"Optimized ONNX model saved to {sess_options.optimized_model_filepath}")
+    except ImportError:
+        print("ONNX Runtime not installed, skipping graph optimization")
+    except Exception as e:
+        print(f"ONNX graph optimization failed: {e}")
+    
+    # Save a dynamically quantized INT8 version as well. Only the fully
+    # connected layers are quantized: they hold nearly all of the weights,
+    # and ONNX Runtime's CPU provider lacks ConvInteger kernels for some
+    # input types.
+    try:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        int8_path = onnx_path.replace('.onnx', '_int8.onnx')
+        quantize_dynamic(onnx_path, int8_path, op_types_to_quantize=['MatMul', 'Gemm'], weight_type=QuantType.QInt8)
+        print(f"INT8 ONNX model saved to {int8_path}")
+    except ImportError:
+        print("ONNX Runtime not installed, skipping quantization")
+    except Exception as e:
+        print(f"ONNX model quantization failed: {e}")
+    
+    # Save an FP16 version for GPU runtimes, keeping FP32 inputs and outputs
+    # so callers don't need to cast
+    try:
+        import onnx
+        from onnxconverter_common import float16
+        fp16_model = float16.convert_float_to_float16(onnx.load(onnx_path), keep_io_types=True)
+        fp16_path = onnx_path.replace('.onnx', '_fp16.onnx')
+        onnx.save(fp16_model, fp16_path)
+        print(f"FP16 ONNX model saved to {fp16_path}")
+    except ImportError:
+        print("onnxconverter-common not installed, skipping FP16 conversion")
+    except Exception as e:
+        print(f"ONNX FP16 conversion failed: {e}")
+    
+    # Prebuild an INT8 TensorRT engine so GPU deployments don't parse and
+    # optimize the ONNX model on every startup
+    if device.type == "cuda":
+        try:
+            engine_path = onnx_path.replace('.onnx', '.plan')
+            build_tensorrt_engine(onnx_path, engine_path)
+            print(f"TensorRT engine saved to {engine_path}")
+        except ImportError:
+            print("TensorRT not installed, skipping engine build")
+        except Exception as e:
+            print(f"TensorRT engine build failed: {e}")
+    
     return model_path, onnx_path
 
 if __name__ == "__main__":